@@ -1,7 +1,7 @@
 from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.db import async_session_maker
 from app.models.db import Role, Permission
 
 from typing import List
@@ -11,60 +11,41 @@ class RolesCrud:
     model = Role
 
     @classmethod
-    async def roles_with_permissions(
-        cls,
-    ):
-        async with async_session_maker() as session:
-            result = await session.execute(
-                select(Role).options(selectinload(Role.permissions))
-            )
-            roles = result.scalars().all()
-        return roles
+    async def roles_with_permissions(cls, session: AsyncSession):
+        result = await session.execute(
+            select(Role).options(selectinload(Role.permissions))
+        )
+        return result.scalars().all()
 
     @staticmethod
-    async def get_role_by_name(name: str) -> Role:
-        async with async_session_maker() as session:
-            result = await session.execute(select(Role).where(Role.name == name))
-            return result.scalar_one_or_none()
+    async def get_role_by_name(session: AsyncSession, name: str) -> Role:
+        result = await session.execute(select(Role).where(Role.name == name))
+        return result.scalar_one_or_none()
 
     @staticmethod
     async def create_role(
-        name: str, description: str, permission_codes: List[str]
+        session: AsyncSession, name: str, description: str, permission_codes: List[str]
     ) -> Role:
-        async with async_session_maker() as session:
-            async with session.begin():
-                result = await session.execute(
-                    select(Permission).where(Permission.code.in_(permission_codes))
-                )
-                permissions = result.scalars().all()
+        result = await session.execute(
+            select(Permission).where(Permission.code.in_(permission_codes))
+        )
+        permissions = result.scalars().all()
 
-                new_role = Role(
-                    name=name, description=description, permissions=permissions
-                )
-                session.add(new_role)
-            await session.refresh(new_role)
-            await session.execute(
-                select(Role)
-                .options(selectinload(Role.permissions))
-                .where(Role.id == new_role.id)
-            )
-
-            return new_role
+        new_role = Role(name=name, description=description, permissions=permissions)
+        session.add(new_role)
+        await session.flush()
+        return new_role
 
     @staticmethod
-    async def get_by_code(code: str) -> Permission | None:
-        async with async_session_maker() as session:
-            result = await session.execute(
-                select(Permission).where(Permission.code == code)
-            )
-            return result.scalar_one_or_none()
+    async def get_by_code(session: AsyncSession, code: str) -> Permission | None:
+        result = await session.execute(
+            select(Permission).where(Permission.code == code)
+        )
+        return result.scalar_one_or_none()
 
     @staticmethod
-    async def create(code: str, description: str) -> Permission:
-        async with async_session_maker() as session:
-            async with session.begin():
-                permission = Permission(code=code, description=description)
-                session.add(permission)
-                await session.flush()
-                await session.refresh(permission)
-                return permission
+    async def create(session: AsyncSession, code: str, description: str) -> Permission:
+        permission = Permission(code=code, description=description)
+        session.add(permission)
+        await session.flush()
+        return permission
@@ -5,8 +5,14 @@ from pathlib import Path
 class Settings(BaseSettings):
     JWT_SECRET: str
     JWT_ALGORITHM: str
+    # сколько проверенных access-токенов держать в памяти процесса
+    ACCESS_TOKEN_CACHE_SIZE: int = 10000
     ACCESS_TOKEN_EXPIRE_MINUTES: int
     REFRESH_TOKEN_EXPIRE_DAYS: int
+    # в токене вместо списка кодов разрешений — role_id и версия таблицы
+    COMPACT_PERMISSIONS: bool = False
+    # как часто сверять таблицу role_id -> разрешения с Redis, секунды
+    PERMISSION_TABLE_TTL: float = 30
     model_config = SettingsConfigDict(
         env_file=Path(__file__).parent.parent / ".env", extra="ignore"
     )
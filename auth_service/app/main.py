@@ -1,18 +1,53 @@
 import time
+import asyncio
 
 from fastapi import FastAPI, Request
+from contextlib import asynccontextmanager
 from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
 from starlette.responses import Response
 
 from app.routes.auth import auth
 from app.routes.roles import roles
 from app.routes.users import users
+from app.db import warm_up_pools, dispose_engines
+from app.redis.redis_client import close_redis, run_redis_health_check
+from app.services.work_with_pass import shutdown_password_executor
+from app.services.token_service import jwt_service
 from app.logger import setup_logger
+from loguru import logger
 
 
 setup_logger()
 
-app = FastAPI()
+
+async def backfill_refresh_index():
+    try:
+        await jwt_service.redis_store.backfill_index(
+            int(jwt_service.refresh_token_ttl.total_seconds())
+        )
+    except Exception as e:
+        # logout со всех устройств всё равно дочищает такие токены SCAN'ом
+        logger.error(f"Не удалось достроить индекс refresh-токенов: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await warm_up_pools()
+    redis_health = asyncio.create_task(run_redis_health_check())
+    refresh_backfill = asyncio.create_task(backfill_refresh_index())
+    yield
+    for task in (redis_health, refresh_backfill):
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    shutdown_password_executor()
+    await close_redis()
+    await dispose_engines()
+
+
+app = FastAPI(lifespan=lifespan)
 
 REQUEST_COUNT = Counter(
     "http_requests_total", "Total number of HTTP requests", ["method", "endpoint"]
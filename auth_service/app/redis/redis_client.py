@@ -1,36 +1,103 @@
-from typing import Optional
+from typing import Optional, Tuple
 import asyncio
 
-import aioredis
-from aioredis import Redis
+from aioredis import BlockingConnectionPool, Redis
 from loguru import logger
+from prometheus_client import Gauge
 
-from app.redis.redis_config import get_redis_url
+from app.redis.redis_config import get_redis_url, settings
 
+pool: Optional[BlockingConnectionPool] = None
 redis: Optional[Redis] = None
-lock = asyncio.Lock()
 
+REDIS_POOL_IN_USE = Gauge(
+    "redis_pool_connections_in_use", "Redis connections checked out of the pool"
+)
+REDIS_POOL_AVAILABLE = Gauge(
+    "redis_pool_connections_available", "Idle Redis connections in the pool"
+)
+REDIS_POOL_MAX = Gauge("redis_pool_max_connections", "Redis pool size limit")
+REDIS_UP = Gauge("redis_up", "Result of the last background Redis PING")
 
-async def reconnect_redis():
-    global redis
-    if redis:
-        try:
-            await redis.close()
-        except Exception as e:
-            logger.error(f"Error while closing Redis: {e}")
 
-    redis = aioredis.from_url(get_redis_url(), decode_responses=True)
-    logger.info("Redis reconnected.")
+def _pool_usage() -> Tuple[int, int]:
+    """
+    (выданные, простаивающие) соединения пула. Публичного API для этого
+    у aioredis нет: в очереди пула лежат простаивающие соединения
+    и None на месте ещё не открытых, а открытые перечислены в _connections.
+    Если внутренности поменяются с версией библиотеки, метрики покажут 0,
+    а не уронят /metrics.
+    """
+    if pool is None:
+        return 0, 0
+    try:
+        in_use = pool.max_connections - pool.pool.qsize()
+        return in_use, len(pool._connections) - in_use
+    except AttributeError:
+        return 0, 0
+
+
+REDIS_POOL_IN_USE.set_function(lambda: _pool_usage()[0])
+REDIS_POOL_AVAILABLE.set_function(lambda: _pool_usage()[1])
+REDIS_POOL_MAX.set(settings.REDIS_MAX_CONNECTIONS)
+
+
+def _create_client() -> Redis:
+    global pool
+    # при исчерпании пула запрос ждёт свободное соединение до
+    # REDIS_POOL_TIMEOUT секунд, а не получает ConnectionError сразу
+    pool = BlockingConnectionPool.from_url(
+        get_redis_url(),
+        decode_responses=True,
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        timeout=settings.REDIS_POOL_TIMEOUT,
+        # соединение, простоявшее дольше интервала, проверяется PING'ом
+        # перед выдачей и при обрыве переоткрывается
+        health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+        socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        socket_keepalive=True,
+        retry_on_timeout=True,
+    )
+    return Redis(connection_pool=pool)
 
 
 async def get_redis() -> Redis:
+    """
+    Общий клиент поверх пула соединений. Создаётся лениво и без сетевых
+    вызовов, так что каждая операция с кэшем — один round trip.
+    """
     global redis
-    async with lock:
-        if redis is None:
-            redis = aioredis.from_url(get_redis_url(), decode_responses=True)
+    if redis is None:
+        redis = _create_client()
+    return redis
+
+
+async def run_redis_health_check():
+    """
+    Фоновая проверка доступности Redis для метрики redis_up.
+    Запросы её не ждут.
+    """
+    while True:
         try:
-            await redis.ping()
+            client = await get_redis()
+            await client.ping()
+            REDIS_UP.set(1)
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
-            await reconnect_redis()
+            REDIS_UP.set(0)
+            logger.warning(f"Redis недоступен: {e}")
+        await asyncio.sleep(settings.REDIS_HEALTH_CHECK_INTERVAL)
 
-    return redis
+
+async def close_redis():
+    global redis, pool
+    if redis is None:
+        return
+    try:
+        await redis.close()
+        await pool.disconnect()
+    except Exception as e:
+        logger.error(f"Error while closing Redis: {e}")
+    redis = pool = None
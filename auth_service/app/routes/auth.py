@@ -1,24 +1,33 @@
-from fastapi import APIRouter, HTTPException, Response, Request
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Response, Request
 from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.schemas.schemas import (
     UserRegisterRequest,
     UserLoginRequest,
     LoginResponse,
+    SessionResponse,
     UserResponse,
 )
 from app.crud.auth import UserCrud
+from app.db import get_read_session, get_session
 from app.services.token_service import jwt_service
+from app.services.permission_table import permission_table
+from app.services.check_token_service import get_token_payload, require_access_token
 
 
 auth = APIRouter(prefix="/auth", tags=["Авторицация/Аутентификация"])
 
 
 @auth.post("/register", summary="Регистрация нового пользователя")
-async def register_user(user: UserRegisterRequest):
+async def register_user(
+    user: UserRegisterRequest, session: AsyncSession = Depends(get_session)
+):
     try:
         await UserCrud.create(
-            email=user.email, full_name=user.full_name, password=user.password
+            session, email=user.email, full_name=user.full_name, password=user.password
         )
         return {"detail": "User registered successfully"}
     except ValueError as e:
@@ -33,17 +42,23 @@ async def register_user(user: UserRegisterRequest):
     status_code=200,
     response_model=LoginResponse,
 )
-async def authentication(payload: UserLoginRequest, response: Response):
+async def authentication(
+    payload: UserLoginRequest,
+    response: Response,
+    session: AsyncSession = Depends(get_session),
+):
     try:
         user = await UserCrud.authenticate(
-            email=payload.email, password=payload.password
+            session, email=payload.email, password=payload.password
         )
     except ValueError:
         raise HTTPException(status_code=401, detail="Неверный email или пароль")
-    permissions = [perm.code for perm in user.role.permissions]
-    access_token = jwt_service.create_access_token(str(user.id), permissions)
+    permission_claims = await permission_table.token_claims(session, user.role_id)
+    access_token = jwt_service.create_access_token(str(user.id), permission_claims)
     refresh_token = await jwt_service.create_refresh_token(
-        str(user.id), permissions, {"ua": payload.user_agent, "ip": payload.ip_address}
+        str(user.id),
+        permission_claims,
+        {"ua": payload.user_agent, "ip": payload.ip_address},
     )
     response.set_cookie(
         key="access_token",
@@ -67,7 +82,9 @@ async def authentication(payload: UserLoginRequest, response: Response):
 @auth.get(
     "/me", summary="Получить информацию о пользователе", response_model=UserResponse
 )
-async def get_user_info(request: Request):
+async def get_user_info(
+    request: Request, session: AsyncSession = Depends(get_read_session)
+):
     token = request.cookies.get("access_token")
     if not token:
         raise HTTPException(status_code=401, detail="Access token отсутствует")
@@ -76,7 +93,7 @@ async def get_user_info(request: Request):
         user_id = jwt_service.get_user_id_from_token(token)
     except Exception:
         raise HTTPException(status_code=401, detail="Недействительный access token")
-    user = await UserCrud.get_by_id(user_id)
+    user = await UserCrud.get_by_id(session, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="Пользователь не найден")
 
@@ -88,6 +105,17 @@ async def get_user_info(request: Request):
     )
 
 
+@auth.get(
+    "/sessions",
+    summary="Активные сессии текущего пользователя",
+    response_model=List[SessionResponse],
+)
+@require_access_token
+async def get_sessions(request: Request):
+    user_id = get_token_payload(request)["user_id"]
+    return await jwt_service.redis_store.list_sessions(user_id)
+
+
 @auth.get("/refresh", summary="Обновление JWT", status_code=201)
 async def refresh_token(request: Request, response: Response):
     refresh_token = request.cookies.get("refresh_token")
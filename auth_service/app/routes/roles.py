@@ -1,5 +1,7 @@
 from typing import List
-from fastapi import APIRouter, HTTPException, Request, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.schemas.schemas import (
     RoleWithPermissionsSchema,
@@ -7,12 +9,26 @@ from app.schemas.schemas import (
     PermissionSchema,
 )
 from app.crud.roles import RolesCrud
+from app.db import get_session
+from app.services.permission_table import permission_table
 from app.services.check_token_service import require_access_token, require_permission
 
 
 roles = APIRouter(prefix="/roles", tags=["Работа с ролями и разрешениями"])
 
 
+async def publish_permissions(session: AsyncSession):
+    """
+    Публикует таблицу разрешений после коммита. Изменение в базе уже
+    состоялось, поэтому сбой Redis только логируется; публикацию повторит
+    первый же логин или refresh (PermissionTable.get с сессией).
+    """
+    try:
+        await permission_table.reload(session)
+    except Exception as e:
+        logger.error(f"Не удалось опубликовать таблицу разрешений: {e}")
+
+
 @roles.get(
     "/all",
     summary="Получить все роли, разрешения и отношения",
@@ -20,8 +36,8 @@ roles = APIRouter(prefix="/roles", tags=["Работа с ролями и раз
 )
 @require_access_token
 @require_permission("manager.manager")
-async def get_user_info(request: Request):
-    return await RolesCrud.roles_with_permissions()
+async def get_user_info(request: Request, session: AsyncSession = Depends(get_session)):
+    return await RolesCrud.roles_with_permissions(session)
 
 
 @roles.post(
@@ -32,20 +48,24 @@ async def get_user_info(request: Request):
 )
 @require_access_token
 @require_permission("manager.manager")
-async def add_role(request: Request):
+async def add_role(request: Request, session: AsyncSession = Depends(get_session)):
     data = await request.json()
     role_data = RoleCreateRequest(**data)
-    existing_role = await RolesCrud.get_role_by_name(role_data.name)
+    existing_role = await RolesCrud.get_role_by_name(session, role_data.name)
     if existing_role:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Роль с таким именем уже существует.",
         )
     new_role = await RolesCrud.create_role(
+        session,
         name=role_data.name,
         description=role_data.description,
         permission_codes=role_data.permissions,
     )
+    # новая таблица ролей публикуется только после коммита
+    await session.commit()
+    await publish_permissions(session)
     return new_role
 
 
@@ -57,11 +77,11 @@ async def add_role(request: Request):
 )
 @require_access_token
 @require_permission("manager.manager")
-async def add_role(request: Request):
+async def add_role(request: Request, session: AsyncSession = Depends(get_session)):
     data = await request.json()
     permission_data = PermissionSchema(**data)
 
-    existing = await RolesCrud.get_by_code(permission_data.code)
+    existing = await RolesCrud.get_by_code(session, permission_data.code)
     if existing:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -69,7 +89,9 @@ async def add_role(request: Request):
         )
 
     new_permission = await RolesCrud.create(
-        code=permission_data.code, description=permission_data.description
+        session, code=permission_data.code, description=permission_data.description
     )
+    await session.commit()
+    await publish_permissions(session)
 
     return new_permission
@@ -1,7 +1,9 @@
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.schemas.schemas import UserUpdateRequest, UserResponse
 from app.crud.users import UserCrud
+from app.db import get_session
 from app.services.check_token_service import require_access_token, require_permission
 
 
@@ -16,12 +18,12 @@ users = APIRouter(prefix="/users", tags=["Работа с пользовател
 )
 @require_access_token
 @require_permission("manager.manager")
-async def put_user(request: Request):
+async def put_user(request: Request, session: AsyncSession = Depends(get_session)):
     data = await request.json()
     user_data = UserUpdateRequest(**data)
 
     try:
-        user = await UserCrud.update_user(user_data)
+        user = await UserCrud.update_user(session, user_data)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
@@ -1,3 +1,4 @@
+from datetime import datetime
 from uuid import UUID
 from pydantic import BaseModel, EmailStr, Field
 
@@ -59,3 +60,10 @@ class UserResponse(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class SessionResponse(BaseModel):
+    token_id: str
+    expires_at: datetime
+    user_agent: Optional[str] = Field(None, validation_alias="ua")
+    ip_address: Optional[str] = Field(None, validation_alias="ip")
@@ -0,0 +1,141 @@
+from typing import Dict, FrozenSet, Optional
+import asyncio
+import json
+import time
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.roles import RolesCrud
+from app.jwt_config import settings_jwt
+from app.redis.redis_client import get_redis
+
+
+# role_id -> JSON-список кодов разрешений, в поле _version — версия таблицы.
+# Таблицу публикует auth_service, остальные сервисы её только читают.
+TABLE_KEY = "role_permissions"
+VERSION_KEY = "role_permissions:version"
+VERSION_FIELD = "_version"
+
+# Новая версия берётся из отдельного счётчика, чтобы не пойти назад,
+# даже если сам hash потерялся. Таблица заменяется целиком атомарно.
+# HSET идёт пачками по 500 ролей: unpack всего ARGV упирается в предел
+# стека Lua на нескольких тысячах полей.
+# KEYS: role_permissions, role_permissions:version
+# ARGV: role_id, коды (JSON), role_id, коды, ...
+PUBLISH_SCRIPT = """
+local version = redis.call('INCR', KEYS[2])
+redis.call('DEL', KEYS[1])
+redis.call('HSET', KEYS[1], '_version', version)
+for i = 1, #ARGV, 1000 do
+    redis.call('HSET', KEYS[1], unpack(ARGV, i, math.min(i + 999, #ARGV)))
+end
+return version
+"""
+
+
+class PermissionTable:
+    """
+    Кэш role_id -> frozenset кодов разрешений в памяти процесса.
+    Копия сверяется с Redis не чаще раза в ttl секунд и сразу, если пришёл
+    токен с версией новее загруженной. Если в Redis таблицы ещё нет,
+    она собирается из базы и публикуется.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.version = 0
+        self._roles: Dict[int, FrozenSet[str]] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self._publish_script = None
+        # последняя публикация не удалась: повторяем при первом get с сессией
+        self._publish_pending = False
+
+    def _is_stale(self, version: int) -> bool:
+        return (
+            self._loaded_at is None
+            or version > self.version
+            or time.monotonic() - self._loaded_at > self.ttl
+        )
+
+    def _set(self, version: int, roles: Dict[int, FrozenSet[str]]):
+        self.version = version
+        self._roles = roles
+        self._loaded_at = time.monotonic()
+
+    async def _load_from_redis(self) -> bool:
+        redis = await get_redis()
+        raw = await redis.hgetall(TABLE_KEY)
+        if VERSION_FIELD not in raw:
+            return False
+        version = int(raw.pop(VERSION_FIELD))
+        self._set(
+            version,
+            {
+                int(role_id): frozenset(json.loads(codes))
+                for role_id, codes in raw.items()
+            },
+        )
+        return True
+
+    async def reload(self, session: AsyncSession):
+        """
+        Перечитывает роли из базы и публикует новую версию таблицы.
+        Вызывается после изменения ролей и разрешений.
+        """
+        roles = {
+            role.id: frozenset(perm.code for perm in role.permissions)
+            for role in await RolesCrud.roles_with_permissions(session)
+        }
+        args = []
+        for role_id, codes in roles.items():
+            args += [role_id, json.dumps(sorted(codes))]
+
+        try:
+            redis = await get_redis()
+            if self._publish_script is None:
+                self._publish_script = redis.register_script(PUBLISH_SCRIPT)
+            version = await self._publish_script(
+                keys=[TABLE_KEY, VERSION_KEY], args=args, client=redis
+            )
+        except Exception:
+            self._publish_pending = True
+            raise
+        self._publish_pending = False
+        self._set(int(version), roles)
+
+    async def get(
+        self,
+        role_id: Optional[int],
+        version: int = 0,
+        session: Optional[AsyncSession] = None,
+    ) -> FrozenSet[str]:
+        """
+        Разрешения роли. session нужна только на случай, когда таблицы
+        нет и в Redis и её надо собрать из базы (например, при логине),
+        и для повтора не удавшейся публикации.
+        """
+        if self._publish_pending and session is not None:
+            async with self._lock:
+                if self._publish_pending:
+                    await self.reload(session)
+        if self._is_stale(version):
+            async with self._lock:
+                if self._is_stale(version):
+                    loaded = await self._load_from_redis()
+                    if not loaded and session is not None:
+                        await self.reload(session)
+        return self._roles.get(role_id, frozenset())
+
+    async def token_claims(self, session: AsyncSession, role_id: Optional[int]) -> dict:
+        """
+        Claims о правах для нового токена: полный список кодов или,
+        при COMPACT_PERMISSIONS, только role_id и версия таблицы.
+        """
+        permissions = await self.get(role_id, session=session)
+        if settings_jwt.COMPACT_PERMISSIONS:
+            return {"role_id": role_id, "perm_v": self.version}
+        return {"permissions": sorted(permissions)}
+
+
+permission_table = PermissionTable(settings_jwt.PERMISSION_TABLE_TTL)
@@ -1,13 +1,104 @@
 from app.redis.redis_client import get_redis
-from typing import Optional
+from typing import List, Optional
 import json
+import time
+
+from loguru import logger
+
+
+# Удаляет все refresh-токены пользователя по индексу и сам индекс.
+# KEYS[1] — refresh_index:{user_id}, ARGV[1] — префикс refresh:{user_id}:
+LOGOUT_ALL_SCRIPT = """
+local token_ids = redis.call('ZRANGE', KEYS[1], 0, -1)
+for i = 1, #token_ids, 500 do
+    local keys = {}
+    for j = i, math.min(i + 499, #token_ids) do
+        keys[#keys + 1] = ARGV[1] .. token_ids[j]
+    end
+    redis.call('DEL', unpack(keys))
+end
+redis.call('DEL', KEYS[1])
+return #token_ids
+"""
+
+
+# Токены, выданные до появления индекса, в нём не числятся. Пока самые
+# поздние из них не истекли (legacy_until), logout со всех устройств
+# дополнительно ищет ключи пользователя SCAN'ом, а при старте индекс
+# один раз достраивается из существующих ключей. Запас ROLLOUT_GRACE
+# покрывает токены, которые старые экземпляры выдают во время выкатки.
+LEGACY_UNTIL_KEY = "refresh_index:legacy_until"
+BACKFILL_KEY = "refresh_index:backfilled"
+ROLLOUT_GRACE = 24 * 3600
+SCAN_COUNT = 1000
+
+# Заносит в индексы refresh-ключи из KEYS, которых там ещё нет, со сроком
+# по их TTL, и продлевает индекс, если ключ живёт дольше него.
+# KEYS — refresh:{user_id}:{token_id}, ARGV[1] — текущее unix-время
+BACKFILL_SCRIPT = """
+local added = 0
+for _, key in ipairs(KEYS) do
+    local user_id, token_id = string.match(key, '^refresh:([^:]+):(.+)$')
+    local ttl = redis.call('TTL', key)
+    if user_id and ttl > 0 then
+        local index_key = 'refresh_index:' .. user_id
+        added = added + redis.call('ZADD', index_key, 'NX', ARGV[1] + ttl, token_id)
+        if redis.call('TTL', index_key) < ttl then
+            redis.call('EXPIRE', index_key, ttl)
+        end
+    end
+end
+return added
+"""
+
+
+# Ротация: старый токен удаляется и новый записывается только если старый
+# ещё существовал, так что из параллельных refresh одного токена проходит один.
+# KEYS: refresh:{user}:{old}, refresh_index:{user}, refresh:{user}:{new}
+# ARGV: old token_id, new token_id, метаданные (JSON), ttl, время истечения
+ROTATE_SCRIPT = """
+if redis.call('DEL', KEYS[1]) == 0 then
+    return 0
+end
+redis.call('ZREM', KEYS[2], ARGV[1])
+redis.call('SET', KEYS[3], ARGV[3], 'EX', ARGV[4])
+redis.call('ZADD', KEYS[2], ARGV[5], ARGV[2])
+redis.call('EXPIRE', KEYS[2], ARGV[4])
+return 1
+"""
 
 
 class RedisRefreshTokenStore:
+    """
+    refresh:{user_id}:{token_id} — метаданные сессии (ua, ip) с TTL токена.
+    refresh_index:{user_id} — sorted set token_id -> unix-время истечения,
+    по нему работают logout со всех устройств и список сессий без KEYS.
+    """
+
     def __init__(
         self,
     ):
         self.default_ttl: int = 7 * 24 * 3600
+        self._scripts = {}
+
+    @staticmethod
+    def _key(user_id: str, token_id: str) -> str:
+        return f"refresh:{user_id}:{token_id}"
+
+    @staticmethod
+    def _index_key(user_id: str) -> str:
+        return f"refresh_index:{user_id}"
+
+    async def _run_script(self, source: str, keys: list, args: list):
+        """
+        Выполняет Lua-скрипт через EVALSHA (с откатом на EVAL при промахе
+        в кэше скриптов Redis) за один round trip.
+        """
+        redis = await get_redis()
+        script = self._scripts.get(source)
+        if script is None:
+            script = self._scripts[source] = redis.register_script(source)
+        return await script(keys=keys, args=args, client=redis)
 
     async def save_token(
         self, user_id: str, token_id: str, payload: dict, ttl: Optional[int] = None
@@ -16,11 +107,20 @@ class RedisRefreshTokenStore:
         Сохраняет refresh token в Redis.
         Ключ: refresh:{user_id}:{token_id}
         Значение: JSON с полезными данными (user_agent, ip и т.д.)
+        Токен и запись в индексе пишутся одной транзакцией MULTI/EXEC.
         """
         redis = await get_redis()
-        key = f"refresh:{user_id}:{token_id}"
-        value = json.dumps(payload)
-        await redis.set(key, value, ex=ttl or self.default_ttl)
+        ttl = ttl or self.default_ttl
+        index_key = self._index_key(user_id)
+        async with redis.pipeline(transaction=True) as pipe:
+            # у всех refresh-токенов одинаковый TTL, так что свежий токен
+            # живёт дольше остальных и индекс продлевается до его срока
+            await (
+                pipe.set(self._key(user_id, token_id), json.dumps(payload), ex=ttl)
+                .zadd(index_key, {token_id: time.time() + ttl})
+                .expire(index_key, ttl)
+                .execute()
+            )
 
     async def get_token(self, user_id: str, token_id: str) -> Optional[dict]:
         """
@@ -28,7 +128,7 @@ class RedisRefreshTokenStore:
         Если не найден — возвращает None.
         """
         redis = await get_redis()
-        key = f"refresh:{user_id}:{token_id}"
+        key = self._key(user_id, token_id)
         value = await redis.get(key)
         if value is not None:
             return json.loads(value)
@@ -39,15 +139,111 @@ class RedisRefreshTokenStore:
         Удаляет refresh token по ключу (например, при logout).
         """
         redis = await get_redis()
-        key = f"refresh:{user_id}:{token_id}"
-        await redis.delete(key)
+        async with redis.pipeline(transaction=True) as pipe:
+            await (
+                pipe.delete(self._key(user_id, token_id))
+                .zrem(self._index_key(user_id), token_id)
+                .execute()
+            )
 
-    async def delete_all_tokens_for_user(self, user_id: str):
+    async def delete_all_tokens_for_user(self, user_id: str) -> int:
         """
-        Удаляет все refresh токены пользователя (logout со всех устройств).
+        Удаляет все refresh токены пользователя (logout со всех устройств)
+        одним вызовом Lua-скрипта. Возвращает число удалённых сессий.
+        Пока могут жить токены без записи в индексе, они дочищаются SCAN'ом.
         """
+        deleted = await self._run_script(
+            LOGOUT_ALL_SCRIPT,
+            keys=[self._index_key(user_id)],
+            args=[self._key(user_id, "")],
+        )
         redis = await get_redis()
-        pattern = f"refresh:{user_id}:*"
-        keys = await redis.keys(pattern)
-        if keys:
-            await redis.delete(*keys)
+        legacy_until = await redis.get(LEGACY_UNTIL_KEY)
+        if legacy_until is None or time.time() < float(legacy_until):
+            async for key in redis.scan_iter(
+                match=self._key(user_id, "*"), count=SCAN_COUNT
+            ):
+                deleted += await redis.delete(key)
+        return deleted
+
+    async def backfill_index(self, ttl: int):
+        """
+        Однократно при выкатке индекса: заносит в refresh_index:{user_id}
+        токены, выданные до него. ttl — срок жизни refresh-токена,
+        от него считается конец окна legacy_until.
+        """
+        redis = await get_redis()
+        await redis.set(LEGACY_UNTIL_KEY, time.time() + ttl + ROLLOUT_GRACE, nx=True)
+        if await redis.get(BACKFILL_KEY) is not None:
+            return
+
+        added = 0
+        batch = []
+        async for key in redis.scan_iter(match="refresh:*", count=SCAN_COUNT):
+            batch.append(key)
+            if len(batch) >= SCAN_COUNT:
+                added += await self._run_script(
+                    BACKFILL_SCRIPT, keys=batch, args=[time.time()]
+                )
+                batch = []
+        if batch:
+            added += await self._run_script(
+                BACKFILL_SCRIPT, keys=batch, args=[time.time()]
+            )
+        await redis.set(BACKFILL_KEY, 1, ex=ttl + ROLLOUT_GRACE)
+        logger.info(f"Индекс refresh-токенов достроен: добавлено {added}")
+
+    async def rotate_token(
+        self,
+        user_id: str,
+        old_token_id: str,
+        new_token_id: str,
+        payload: dict,
+        ttl: Optional[int] = None,
+    ) -> bool:
+        """
+        Атомарно заменяет refresh token old_token_id на new_token_id.
+        False — старого токена уже нет (отозван, истёк или использован).
+        """
+        ttl = ttl or self.default_ttl
+        rotated = await self._run_script(
+            ROTATE_SCRIPT,
+            keys=[
+                self._key(user_id, old_token_id),
+                self._index_key(user_id),
+                self._key(user_id, new_token_id),
+            ],
+            args=[
+                old_token_id,
+                new_token_id,
+                json.dumps(payload),
+                ttl,
+                time.time() + ttl,
+            ],
+        )
+        return bool(rotated)
+
+    async def list_sessions(self, user_id: str) -> List[dict]:
+        """
+        Активные сессии пользователя: token_id, срок истечения и метаданные.
+        Просроченные записи заодно вычищаются из индекса.
+        """
+        redis = await get_redis()
+        index_key = self._index_key(user_id)
+        async with redis.pipeline(transaction=True) as pipe:
+            _, entries = await (
+                pipe.zremrangebyscore(index_key, "-inf", time.time())
+                .zrange(index_key, 0, -1, withscores=True)
+                .execute()
+            )
+        if not entries:
+            return []
+
+        values = await redis.mget(
+            [self._key(user_id, token_id) for token_id, _ in entries]
+        )
+        return [
+            {"token_id": token_id, "expires_at": expires_at, **json.loads(value)}
+            for (token_id, expires_at), value in zip(entries, values)
+            if value is not None
+        ]
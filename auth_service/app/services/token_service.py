@@ -1,4 +1,7 @@
+import hashlib
+import time
 import uuid
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Tuple
 
@@ -9,10 +12,54 @@ from app.jwt_config import settings_jwt
 from app.services.refresh_store import RedisRefreshTokenStore
 
 
+# claims, в которых токен несёт права: полный список кодов
+# или компактно — роль и версия таблицы разрешений
+PERMISSION_CLAIMS = ("permissions", "role_id", "perm_v")
+
+
+class VerifiedTokenCache:
+    """
+    LRU уже проверенных access-токенов: sha256(токен) -> (exp, payload).
+    Запись отдаётся только до exp токена, так что просроченный токен
+    из кэша не пройдёт.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._items: OrderedDict[bytes, Tuple[float, dict]] = OrderedDict()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[dict]:
+        key = self._key(token)
+        item = self._items.get(key)
+        if item is None:
+            return None
+        exp, payload = item
+        if exp <= time.time():
+            del self._items[key]
+            return None
+        self._items.move_to_end(key)
+        return payload
+
+    def put(self, token: str, payload: dict):
+        exp = payload.get("exp")
+        if exp is None or self.max_size <= 0:
+            return
+        key = self._key(token)
+        self._items[key] = (exp, payload)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+
 class JWTService:
     def __init__(self):
         self.secret_key = settings_jwt.JWT_SECRET
         self.algorithm = settings_jwt.JWT_ALGORITHM
+        self.verified_tokens = VerifiedTokenCache(settings_jwt.ACCESS_TOKEN_CACHE_SIZE)
         self.access_token_ttl = timedelta(
             minutes=settings_jwt.ACCESS_TOKEN_EXPIRE_MINUTES
         )
@@ -22,7 +69,7 @@ class JWTService:
     def _create_payload(
         self,
         user_id: str,
-        permissions: list,
+        permission_claims: dict,
         token_type: str,
         ttl: timedelta,
         jti: Optional[str] = None,
@@ -30,7 +77,7 @@ class JWTService:
         now = datetime.now(timezone.utc)
         return {
             "user_id": user_id,
-            "permissions": permissions,
+            **permission_claims,
             "jti": jti or str(uuid.uuid4()),
             "type": token_type,
             "iat": now,
@@ -47,17 +94,17 @@ class JWTService:
         except JWTError:
             raise HTTPException(status_code=401, detail="Недействительный токен")
 
-    def create_access_token(self, user_id: str, permissions: list) -> str:
+    def create_access_token(self, user_id: str, permission_claims: dict) -> str:
         payload = self._create_payload(
-            user_id, permissions, "access", self.access_token_ttl
+            user_id, permission_claims, "access", self.access_token_ttl
         )
         return self._encode(payload)
 
     async def create_refresh_token(
-        self, user_id: str, permissions: list, metadata: dict
+        self, user_id: str, permission_claims: dict, metadata: dict
     ) -> str:
         payload = self._create_payload(
-            user_id, permissions, "refresh", self.refresh_token_ttl
+            user_id, permission_claims, "refresh", self.refresh_token_ttl
         )
         token = self._encode(payload)
 
@@ -88,16 +135,38 @@ class JWTService:
     async def rotate_tokens(
         self, refresh_token: str, metadata: dict
     ) -> Tuple[str, str]:
-        old_payload = await self.verify_refresh_token(refresh_token)
-        await self.redis_store.delete_token(old_payload["user_id"], old_payload["jti"])
-        access = self.create_access_token(
-            old_payload["user_id"], old_payload["permissions"]
+        """
+        Проверяет refresh_token локально (подпись, срок, тип) и меняет его
+        на новый одним Lua-скриптом в Redis. Повторное использование уже
+        ротированного токена отклоняется.
+        """
+        old_payload = self.decode_token(refresh_token)
+        if old_payload.get("type") != "refresh":
+            raise HTTPException(status_code=401, detail="Недопустимый тип токена")
+
+        user_id = old_payload["user_id"]
+        permission_claims = {
+            claim: old_payload[claim]
+            for claim in PERMISSION_CLAIMS
+            if claim in old_payload
+        }
+        new_payload = self._create_payload(
+            user_id, permission_claims, "refresh", self.refresh_token_ttl
         )
-        refresh = await self.create_refresh_token(
-            old_payload["user_id"], old_payload["permissions"], metadata
+        rotated = await self.redis_store.rotate_token(
+            user_id=user_id,
+            old_token_id=old_payload["jti"],
+            new_token_id=new_payload["jti"],
+            payload=metadata,
+            ttl=int(self.refresh_token_ttl.total_seconds()),
         )
+        if not rotated:
+            raise HTTPException(
+                status_code=401, detail="Refresh токен отозван или истёк"
+            )
 
-        return access, refresh
+        access = self.create_access_token(user_id, permission_claims)
+        return access, self._encode(new_payload)
 
     def verify_access_token(self, token: str) -> dict:
         """
@@ -105,13 +174,19 @@ class JWTService:
         - валидна ли подпись
         - не истёк ли срок
         - является ли токеном типа 'access'
-        Возвращает payload.
+        Возвращает payload. Повторная проверка того же токена до его exp
+        берётся из verified_tokens без разбора подписи.
         """
+        payload = self.verified_tokens.get(token)
+        if payload is not None:
+            return payload
+
         payload = self.decode_token(token)
 
         if payload.get("type") != "access":
             raise HTTPException(status_code=401, detail="Недопустимый тип токена")
 
+        self.verified_tokens.put(token, payload)
         return payload
 
     def get_user_id_from_token(self, token: str) -> str:
@@ -1,12 +1,71 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 from passlib.context import CryptContext
+from prometheus_client import Gauge, Histogram
+
+from app.config import settings
 
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt отпускает GIL на время хеширования, поэтому хватает потоков;
+# размер пула и есть предел одновременных хеширований.
+password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt"
+)
+
+PASSWORD_QUEUE_WAIT = Histogram(
+    "password_hash_queue_wait_seconds",
+    "Time a bcrypt call waits for a free worker",
+    ["operation"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+PASSWORD_DURATION = Histogram(
+    "password_hash_duration_seconds",
+    "Time spent inside bcrypt",
+    ["operation"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 1, 2.5),
+)
+PASSWORD_PENDING = Gauge(
+    "password_hash_pending", "bcrypt calls queued or running", ["operation"]
+)
+
+
+async def _run(operation: str, func, *args):
+    """
+    Выполняет func в пуле bcrypt, не блокируя event loop,
+    и пишет время ожидания в очереди и время работы.
+    """
+    submitted = time.perf_counter()
+
+    def job():
+        started = time.perf_counter()
+        PASSWORD_QUEUE_WAIT.labels(operation=operation).observe(started - submitted)
+        try:
+            return func(*args)
+        finally:
+            PASSWORD_DURATION.labels(operation=operation).observe(
+                time.perf_counter() - started
+            )
+
+    pending = PASSWORD_PENDING.labels(operation=operation)
+    pending.inc()
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(password_executor, job)
+    finally:
+        pending.dec()
+
+
+async def hash_password(password: str) -> str:
+    return await _run("hash", pwd_context.hash, password)
+
 
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await _run("verify", pwd_context.verify, plain_password, hashed_password)
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+def shutdown_password_executor():
+    password_executor.shutdown(wait=False, cancel_futures=True)
@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pathlib import Path
+from typing import Optional
 
 
 class Settings(BaseSettings):
@@ -8,6 +9,24 @@ class Settings(BaseSettings):
     DB_NAME: str
     DB_USER: str
     DB_PASSWORD: str
+    # реплика только для чтения; без DB_REPLICA_HOST всё идёт в primary
+    DB_REPLICA_HOST: Optional[str] = None
+    DB_REPLICA_PORT: Optional[int] = None
+    # отставание реплики (с), после которого чтения уходят в primary
+    DB_REPLICA_MAX_LAG: float = 5.0
+    DB_REPLICA_LAG_CHECK_INTERVAL: float = 1.0
+    # пул соединений; реплика получает такой же
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # кэш: L2 в Redis и L1 в памяти процесса
+    CACHE_TTL: int = 3600
+    CACHE_NEGATIVE_TTL: int = 30
+    CACHE_L1_MAX_SIZE: int = 10000
+    # L1 сбрасывается по событиям product_events, TTL — только страховка
+    CACHE_L1_TTL: float = 300
     model_config = SettingsConfigDict(
         env_file=Path(__file__).parent.parent / ".env", extra="ignore"
     )
@@ -21,3 +40,13 @@ def get_db_url():
         f"postgresql+asyncpg://{settings.DB_USER}:{settings.DB_PASSWORD}@"
         f"{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}"
     )
+
+
+def get_replica_db_url() -> Optional[str]:
+    if not settings.DB_REPLICA_HOST:
+        return None
+    port = settings.DB_REPLICA_PORT or settings.DB_PORT
+    return (
+        f"postgresql+asyncpg://{settings.DB_USER}:{settings.DB_PASSWORD}@"
+        f"{settings.DB_REPLICA_HOST}:{port}/{settings.DB_NAME}"
+    )
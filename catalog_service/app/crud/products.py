@@ -1,44 +1,223 @@
-from sqlalchemy import select
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import (
+    Float,
+    Integer,
+    String,
+    and_,
+    func,
+    literal,
+    literal_column,
+    or_,
+    select,
+    tuple_,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from sqlalchemy import update as sqlalchemy_update, delete as sqlalchemy_delete
 
-from app.db import async_session_maker
 from app.crud.base import BaseCrud
 from app.models.db import Products
+from app.schemas.schemas import ProductBulkUpdateItem
+
+
+# конфигурация полнотекстового поиска, см. Product.search_vector
+SEARCH_CONFIG = "'russian'::regconfig"
 
 
 class Product(BaseCrud):
     model = Products
 
     @classmethod
-    async def find_product_all(cls):
-        async with async_session_maker() as session:
-            query = select(cls.model).options(selectinload(cls.model.category))
-            result = await session.execute(query)
-            return result.scalars().all()
+    async def find_product_all(cls, session: AsyncSession):
+        """
+        Весь каталог одним списком. Только для GET /products/?all=true.
+        """
+        query = select(cls.model).options(selectinload(cls.model.category))
+        result = await session.execute(query)
+        return result.scalars().all()
+
+    # сортировка -> (колонка ключа или None для сортировки по id, по убыванию)
+    SORTS = {
+        "id": (None, False),
+        "price": (Products.price, False),
+        "-price": (Products.price, True),
+        "name": (Products.name, False),
+    }
+
+    @classmethod
+    async def find_products_page(
+        cls,
+        session: AsyncSession,
+        limit: int,
+        sort: str = "id",
+        after: Optional[Tuple[Any, int]] = None,
+        category_id: Optional[int] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+    ):
+        """
+        Страница товаров размером не больше limit + 1 с keyset-пагинацией
+        по (ключ сортировки, id). Лишний товар в конце означает,
+        что есть следующая страница.
+        """
+        column, descending = cls.SORTS[sort]
+        query = select(cls.model).options(selectinload(cls.model.category))
+
+        if category_id is not None:
+            query = query.where(cls.model.category_id == category_id)
+        if min_price is not None:
+            query = query.where(cls.model.price >= min_price)
+        if max_price is not None:
+            query = query.where(cls.model.price <= max_price)
+
+        if column is None:
+            if after is not None:
+                query = query.where(cls.model.id > after[1])
+            query = query.order_by(cls.model.id)
+        else:
+            if after is not None:
+                key = tuple_(column, cls.model.id)
+                position = tuple_(*after)
+                query = query.where(key < position if descending else key > position)
+            if descending:
+                query = query.order_by(column.desc(), cls.model.id.desc())
+            else:
+                query = query.order_by(column, cls.model.id)
+
+        result = await session.execute(query.limit(limit + 1))
+        return result.scalars().all()
+
+    @staticmethod
+    def search_vector():
+        """
+        Выражение индекса ix_products_name_fts (migration 5e8a2d1c7f40).
+        Конфигурация подставляется константой: с параметром вместо неё
+        выражение не совпадёт с индексом.
+        """
+        return func.to_tsvector(literal_column(SEARCH_CONFIG), Products.name)
 
     @classmethod
-    async def find_product_one_or_none_by_id(cls, id_product: int):
-        async with async_session_maker() as session:
-            query = (
-                select(cls.model)
-                .where(cls.model.id == id_product)
-                .options(selectinload(cls.model.category))
+    def _search_query(
+        cls,
+        phrase: str,
+        after: Optional[Tuple[float, int]] = None,
+        category_id: Optional[int] = None,
+    ):
+        tsquery = func.websearch_to_tsquery(literal_column(SEARCH_CONFIG), phrase)
+        vector = cls.search_vector()
+        # лучшая из оценок: ts_rank для совпавших слов, similarity для опечаток
+        rank = func.greatest(
+            func.ts_rank(vector, tsquery), func.similarity(cls.model.name, phrase)
+        )
+        query = (
+            select(cls.model, rank.label("rank"))
+            .options(selectinload(cls.model.category))
+            .where(or_(vector.op("@@")(tsquery), cls.model.name.op("%")(phrase)))
+        )
+        if category_id is not None:
+            query = query.where(cls.model.category_id == category_id)
+        if after is not None:
+            after_rank, after_id = after
+            query = query.where(
+                or_(
+                    rank < after_rank,
+                    and_(rank == after_rank, cls.model.id > after_id),
+                )
             )
-            result = await session.execute(query)
-            return result.scalar_one_or_none()
+        return query.order_by(rank.desc(), cls.model.id)
 
     @classmethod
-    async def update_product(cls, product_id: int, **values) -> int:
-        async with async_session_maker() as session:
-            async with session.begin():
+    async def search(
+        cls,
+        session: AsyncSession,
+        phrase: str,
+        limit: int,
+        after: Optional[Tuple[float, int]] = None,
+        category_id: Optional[int] = None,
+    ):
+        """
+        Полнотекстовый поиск по названию с добором опечаток и частей слов
+        через pg_trgm. Возвращает до limit + 1 строк (Products, rank)
+        по убыванию rank.
+        """
+        query = cls._search_query(phrase, after, category_id).limit(limit + 1)
+        result = await session.execute(query)
+        return result.all()
 
-                query = (
-                    sqlalchemy_update(cls.model)
-                    .where(cls.model.id == product_id)
-                    .values(**values)
-                    .execution_options(synchronize_session="fetch")
-                )
-                result = await session.execute(query)
-                return result.rowcount
+    @classmethod
+    async def find_ids_by_category(cls, session: AsyncSession, category_id: int):
+        result = await session.execute(
+            select(cls.model.id).where(cls.model.category_id == category_id)
+        )
+        return result.scalars().all()
+
+    @classmethod
+    async def find_product_one_or_none_by_id(
+        cls, session: AsyncSession, id_product: int
+    ):
+        query = (
+            select(cls.model)
+            .where(cls.model.id == id_product)
+            .options(selectinload(cls.model.category))
+        )
+        result = await session.execute(query)
+        return result.scalar_one_or_none()
+
+    @classmethod
+    async def update_product(
+        cls, session: AsyncSession, product_id: int, **values
+    ) -> int:
+        query = (
+            sqlalchemy_update(cls.model)
+            .where(cls.model.id == product_id)
+            .values(**values)
+            .execution_options(synchronize_session="fetch")
+        )
+        result = await session.execute(query)
+        return result.rowcount
+
+    @classmethod
+    def _update_many_query(cls, items: List[ProductBulkUpdateItem]):
+        """
+        UPDATE ... FROM unnest(ids, names, prices, category_ids). Поля идут
+        четырьмя массивами, т.е. четырьмя параметрами при любом размере
+        пачки: через VALUES каждое поле было бы своим параметром и пачка
+        упиралась бы в предел asyncpg в 32767 параметров.
+        """
+        new_values = (
+            func.unnest(
+                literal([item.id for item in items], ARRAY(Integer)),
+                literal([item.name for item in items], ARRAY(String)),
+                literal([item.price for item in items], ARRAY(Float)),
+                literal([item.category_id for item in items], ARRAY(Integer)),
+            )
+            .table_valued("id", "name", "price", "category_id")
+            .render_derived(name="new_values")
+        )
+        return (
+            sqlalchemy_update(cls.model)
+            .where(cls.model.id == new_values.c.id)
+            .values(
+                name=func.coalesce(new_values.c.name, cls.model.name),
+                price=func.coalesce(new_values.c.price, cls.model.price),
+                category_id=func.coalesce(
+                    new_values.c.category_id, cls.model.category_id
+                ),
+            )
+            .returning(cls.model.id)
+            .execution_options(synchronize_session=False)
+        )
+
+    @classmethod
+    async def update_many(
+        cls, session: AsyncSession, items: List[ProductBulkUpdateItem]
+    ) -> List[int]:
+        """
+        Применяет изменения всех позиций одним UPDATE; NULL оставляет поле
+        как есть. Возвращает id изменённых товаров.
+        """
+        result = await session.execute(cls._update_many_query(items))
+        return result.scalars().all()
@@ -0,0 +1,73 @@
+import time
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the pool",
+    ["pool"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+DB_POOL_CHECKOUT_TIMEOUTS = Counter(
+    "db_pool_checkout_timeouts_total",
+    "Checkouts that failed with pool timeout",
+    ["pool"],
+)
+DB_POOL_SIZE = Gauge("db_pool_size", "Configured pool size", ["pool"])
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out", "Connections currently checked out", ["pool"]
+)
+DB_POOL_CHECKED_IN = Gauge(
+    "db_pool_checked_in", "Idle connections kept in the pool", ["pool"]
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow", "Connections opened above pool_size", ["pool"]
+)
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    AsyncAdaptedQueuePool, который пишет в гистограмму время выдачи
+    соединения (ожидание свободного, открытие нового, pre-ping).
+    """
+
+    label = "primary"
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            DB_POOL_CHECKOUT_TIMEOUTS.labels(pool=self.label).inc()
+            raise
+        finally:
+            DB_POOL_CHECKOUT_WAIT.labels(pool=self.label).observe(
+                time.perf_counter() - started
+            )
+
+
+def instrumented_pool_class(label: str) -> type[InstrumentedPool]:
+    """
+    Класс пула с заданной меткой. Метка живёт в классе, а не в экземпляре,
+    потому что engine.dispose() пересоздаёт пул через pool.recreate().
+    """
+    return type(f"InstrumentedPool_{label}", (InstrumentedPool,), {"label": label})
+
+
+def register_pool_metrics(engine: AsyncEngine, label: str):
+    """
+    Gauge'и читают состояние текущего пула движка в момент сбора метрик.
+    """
+    DB_POOL_SIZE.labels(pool=label).set_function(lambda: engine.pool.size())
+    DB_POOL_CHECKED_OUT.labels(pool=label).set_function(
+        lambda: engine.pool.checkedout()
+    )
+    DB_POOL_CHECKED_IN.labels(pool=label).set_function(lambda: engine.pool.checkedin())
+    # до заполнения пула QueuePool хранит overflow отрицательным
+    DB_POOL_OVERFLOW.labels(pool=label).set_function(
+        lambda: max(engine.pool.overflow(), 0)
+    )
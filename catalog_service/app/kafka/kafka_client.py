@@ -2,7 +2,7 @@ import json
 import asyncio
 
 from loguru import logger
-from aiokafka import AIOKafkaProducer
+from aiokafka import AIOKafkaConsumer, AIOKafkaProducer
 from kafka.admin import KafkaAdminClient, NewTopic
 from kafka.errors import TopicAlreadyExistsError, NoBrokersAvailable, NodeNotReadyError
 
@@ -10,6 +10,7 @@ from app.kafka.kafka_config import settings
 
 
 producer: AIOKafkaProducer | None = None
+in_flight: asyncio.Semaphore | None = None
 
 
 async def wait_kafka():
@@ -62,7 +63,7 @@ async def init_topic():
 
 
 async def init_kafka_producer():
-    global producer
+    global producer, in_flight
     await wait_kafka()
     await init_topic()
     producer = AIOKafkaProducer(
@@ -71,22 +72,23 @@ async def init_kafka_producer():
         sasl_mechanism=settings.KAFKA_SASL_MECHANISM,
         sasl_plain_username=settings.KAFKA_USERNAME,
         sasl_plain_password=settings.KAFKA_PASSWORD,
+        linger_ms=settings.KAFKA_LINGER_MS,
+        max_batch_size=settings.KAFKA_MAX_BATCH_SIZE,
+        compression_type=settings.KAFKA_COMPRESSION_TYPE,
     )
+    in_flight = asyncio.Semaphore(settings.KAFKA_MAX_IN_FLIGHT)
     await producer.start()
 
 
 async def stop_kafka_producer():
     global producer
     if producer:
+        await producer.flush()  # дослать всё, что ещё лежит в буфере
         await producer.stop()
         producer = None
 
 
-async def produce_kafka_message(
-    value: dict, topic: str = "product_events", key: str | None = None
-):
-    global producer
-
+async def get_kafka_producer() -> AIOKafkaProducer:
     if not producer:
         try:
             await init_kafka_producer()
@@ -95,9 +97,75 @@ async def produce_kafka_message(
 
     if not producer:
         raise RuntimeError("Kafka producer не инициализирован")
+    return producer
+
 
-    await producer.send_and_wait(
-        topic=topic,
-        value=json.dumps(value).encode("utf-8"),
-        key=key.encode("utf-8") if key else None,
+def create_kafka_consumer(topic: str, group_id: str) -> AIOKafkaConsumer:
+    return AIOKafkaConsumer(
+        topic,
+        bootstrap_servers=settings.KAFKA_BOOTSTRAP_SERVERS,
+        security_protocol=settings.KAFKA_SECURITY_PROTOCOL,
+        sasl_mechanism=settings.KAFKA_SASL_MECHANISM,
+        sasl_plain_username=settings.KAFKA_USERNAME,
+        sasl_plain_password=settings.KAFKA_PASSWORD,
+        group_id=group_id,
+        auto_offset_reset="latest",
+        enable_auto_commit=False,
     )
+
+
+def _on_delivered(future: asyncio.Future):
+    in_flight.release()
+    if not future.cancelled() and future.exception():
+        logger.error(f"Ошибка доставки сообщения в Kafka: {future.exception()}")
+
+
+async def send_kafka_message(
+    value: dict, topic: str = "product_events", key: str | None = None
+) -> asyncio.Future:
+    """
+    Fire-and-forget отправка: кладёт сообщение в буфер продюсера и сразу
+    возвращает future подтверждения. Если неподтверждённых сообщений уже
+    KAFKA_MAX_IN_FLIGHT, ждёт, пока брокер не разгребёт очередь.
+    """
+    producer = await get_kafka_producer()
+    await in_flight.acquire()
+    try:
+        future = await producer.send(
+            topic=topic,
+            value=json.dumps(value, separators=(",", ":")).encode("utf-8"),
+            key=key.encode("utf-8") if key else None,
+        )
+    except Exception:
+        in_flight.release()
+        raise
+    future.add_done_callback(_on_delivered)
+    return future
+
+
+async def produce_kafka_message(
+    value: dict, topic: str = "product_events", key: str | None = None
+):
+    """
+    Отправка с ожиданием подтверждения брокера.
+    """
+    await (await send_kafka_message(value, topic=topic, key=key))
+
+
+async def produce_kafka_batch(
+    values: list[dict], topic: str = "product_events", key_field: str | None = None
+):
+    """
+    Отправляет пачку сообщений: все send ставятся в буфер продюсера сразу,
+    подтверждения ждём одним gather, а не по send_and_wait на каждое.
+    Если задан key_field, ключом сообщения становится value[key_field].
+    """
+    futures = [
+        await send_kafka_message(
+            value,
+            topic=topic,
+            key=str(value[key_field]) if key_field else None,
+        )
+        for value in values
+    ]
+    await asyncio.gather(*futures)
@@ -1,4 +1,5 @@
 import time
+import asyncio
 
 from fastapi import FastAPI, Request
 from contextlib import asynccontextmanager
@@ -8,6 +9,9 @@ from starlette.responses import Response
 from app.routes.products import products
 from app.routes.categories import categories
 from app.kafka.kafka_client import init_kafka_producer, stop_kafka_producer
+from app.db import warm_up_pools, dispose_engines
+from app.redis.redis_client import close_redis, run_redis_health_check
+from app.services.cache_events import run_cache_events_consumer
 from app.logger import setup_logger
 
 
@@ -16,9 +20,20 @@ setup_logger()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    await warm_up_pools()
     await init_kafka_producer()
+    redis_health = asyncio.create_task(run_redis_health_check())
+    cache_events = asyncio.create_task(run_cache_events_consumer())
     yield
+    for task in (cache_events, redis_health):
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
     await stop_kafka_producer()
+    await close_redis()
+    await dispose_engines()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -1,4 +1,4 @@
-from sqlalchemy import ForeignKey, text, Text
+from sqlalchemy import ForeignKey, Index, text, Text
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from app.db import Base, str_uniq, int_pk, str_null_true
 from datetime import date
@@ -22,6 +22,25 @@ class Categories(BaseModelMixin, Base):
 
 class Products(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        # keyset-пагинация GET /products/, см. migration 9c1f4e7a2b3d
+        Index("ix_products_category_id_id", "category_id", "id"),
+        Index("ix_products_category_id_price_id", "category_id", "price", "id"),
+        Index("ix_products_price_id", "price", "id"),
+        Index("ix_products_name_id", "name", "id"),
+        # поиск GET /products/search, см. migration 5e8a2d1c7f40
+        Index(
+            "ix_products_name_fts",
+            text("to_tsvector('russian'::regconfig, name)"),
+            postgresql_using="gin",
+        ),
+        Index(
+            "ix_products_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+    )
 
     id: Mapped[int_pk]
     name: Mapped[str]
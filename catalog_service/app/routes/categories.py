@@ -1,32 +1,53 @@
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.schemas.schemas import CategoryPayload, SCategory
 from app.crud.categories import Category
-from app.services.cache_service import cash
+from app.crud.products import Product
+from app.db import get_session
+from app.services.cache_service import cash, category_cache, product_key
+from app.kafka.kafka_client import send_kafka_message
 from app.services.check_token_service import require_access_token, require_permission
 
 
 categories = APIRouter(prefix="/categories", tags=["Работа с категориями"])
 
 
+async def drop_cached_products(product_ids: list[int]):
+    """
+    Карточка товара содержит категорию, поэтому изменение категории
+    сбрасывает закэшированные товары этой категории.
+    """
+    if product_ids:
+        await cash.delete_value(
+            *(product_key(product_id) for product_id in product_ids)
+        )
+
+
+async def send_category_event(event: str, category_id: int, version: int):
+    await send_kafka_message(
+        value={"event": event, "category_id": category_id, "version": version},
+        key=f"category:{category_id}",
+    )
+
+
+# Сессия нужна только на промахе кэша. Это primary, а не реплика:
+# заполнение кэша сверяет версию с записями, а реплика может отставать.
 @categories.get("/", summary="Получить все категории", response_model=list[SCategory])
-async def get_categories():
+async def get_categories(session: AsyncSession = Depends(get_session)):
     try:
-        categories_data = await cash.get_value("categories_list")
-        if categories_data:
-            return categories_data
-        categories = await Category.find_all()
-        await cash.set_value("categories_list", categories)
-        return categories
+        return list((await category_cache.get_all(session)).values())
     except SQLAlchemyError:
         raise HTTPException(status_code=500, detail="Ошибка при выполнении запроса")
 
 
 @categories.get("/{category_id}", summary="Получить категорию по по category_id")
-async def get_products_by_id(category_id: int) -> SCategory | dict:
+async def get_products_by_id(
+    category_id: int, session: AsyncSession = Depends(get_session)
+) -> SCategory | dict:
     try:
-        result = await Category.find_one_or_none_by_id(category_id)
+        result = await category_cache.get(session, category_id)
         if result is None:
             return HTTPException(
                 status_code=404, detail=f"Категория с ID {category_id} не найдена!"
@@ -39,15 +60,21 @@ async def get_products_by_id(category_id: int) -> SCategory | dict:
 @categories.post("/", summary="Добавить категорию", status_code=201)
 @require_access_token
 @require_permission("manager.manager")
-async def add_category(request: Request, payload: CategoryPayload) -> SCategory | dict:
+async def add_category(
+    request: Request,
+    payload: CategoryPayload,
+    session: AsyncSession = Depends(get_session),
+) -> SCategory | dict:
     try:
-        result = await Category.add(**payload.model_dump())
-        categories = await Category.find_all()
-        await cash.set_value("categories_list", categories)
+        result = await Category.add(session, **payload.model_dump())
         if not result:
             raise HTTPException(
                 status_code=404, detail="Ошибка при добавлении категории!"
             )
+        # в кэш кладём после коммита
+        await session.commit()
+        version = await category_cache.put(result.to_dict())
+        await send_category_event("CATEGORY_CREATED", result.id, version)
         return result
     except SQLAlchemyError:
         raise HTTPException(status_code=500, detail="Ошибка при добавлении категории")
@@ -56,15 +83,26 @@ async def add_category(request: Request, payload: CategoryPayload) -> SCategory
 @categories.put("/{category_id}", summary="Обновить категорию по id", status_code=201)
 @require_access_token
 @require_permission("manager.manager")
-async def put_category(request: Request, category_id: int, payload: CategoryPayload):
+async def put_category(
+    request: Request,
+    category_id: int,
+    payload: CategoryPayload,
+    session: AsyncSession = Depends(get_session),
+):
     try:
-        result = await Category.update_category(category_id, **payload.model_dump())
-        categories = await Category.find_all()
-        await cash.set_value("categories_list", categories)
-        if not result:
+        result = await Category.update_category(
+            session, category_id, **payload.model_dump()
+        )
+        product_ids = await Product.find_ids_by_category(session, category_id)
+        await session.commit()
+        if not result.rowcount:
             return HTTPException(
                 status_code=404, detail="Ошибка при обновлении категории!"
             )
+        # в кэш кладём после коммита
+        version = await category_cache.put({"id": category_id, **payload.model_dump()})
+        await drop_cached_products(product_ids)
+        await send_category_event("CATEGORY_UPDATED", category_id, version)
         return {"message": "Категория успешно обновлена", "Категория": payload}
     except SQLAlchemyError:
         raise HTTPException(status_code=500, detail="Ошибка при выполнении запроса")
@@ -76,15 +114,21 @@ async def put_category(request: Request, category_id: int, payload: CategoryPayl
 async def delete_product(
     request: Request,
     category_id: int,
+    session: AsyncSession = Depends(get_session),
 ):
     try:
-        result = await Category.delete_category(category_id)
-        categories = await Category.find_all()
-        await cash.set_value("categories_list", categories)
-        if not result:
+        # товары категории удалятся каскадом, их id нужны до удаления
+        product_ids = await Product.find_ids_by_category(session, category_id)
+        result = await Category.delete_category(session, category_id)
+        await session.commit()
+        if not result.rowcount:
             return HTTPException(
                 status_code=404, detail="Ошибка при удалении категории!"
             )
+        # из кэша удаляем после коммита
+        version = await category_cache.remove(category_id)
+        await drop_cached_products(product_ids)
+        await send_category_event("CATEGORY_DELETED", category_id, version)
         return {"message": "Категория успешно удалена", "Категория": category_id}
     except SQLAlchemyError:
         raise HTTPException(status_code=500, detail="Ошибка при выполнении запроса")
@@ -1,27 +1,112 @@
-from fastapi import APIRouter, HTTPException, Request
-from sqlalchemy.exc import SQLAlchemyError
+from typing import Literal, Optional
 
-from app.schemas.schemas import ProductsPayload, SProduct
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from loguru import logger
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.schemas.schemas import (
+    ProductBulkUpdatePayload,
+    ProductBulkUpdateResponse,
+    ProductImportReport,
+    ProductsPage,
+    ProductsPayload,
+    SProduct,
+)
 from app.crud.products import Product
-from app.kafka.kafka_client import produce_kafka_message
+from app.db import get_read_session, get_session
+from app.kafka.kafka_client import produce_kafka_batch, send_kafka_message
 from app.services.check_token_service import require_access_token, require_permission
+from app.services.pagination import encode_cursor, decode_cursor
+from app.services.cache_service import cash, product_key
+from app.services.product_import import import_products, publish_import
 
 
 products = APIRouter(prefix="/products", tags=["Работа с Позициями"])
 
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
 
-@products.get("/", summary="Получить все продукты", response_model=list[SProduct])
-async def get_products():
+@products.get("/", summary="Получить продукты постранично")
+async def get_products(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: Literal["id", "price", "-price", "name"] = "id",
+    category_id: Optional[int] = None,
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    all: bool = Query(False, description="Весь каталог одним списком, без фильтров"),
+    session: AsyncSession = Depends(get_read_session),
+) -> ProductsPage | list[SProduct]:
     try:
-        return await Product.find_product_all()
+        if all:
+            return await Product.find_product_all(session)
+
+        after = decode_cursor(cursor, sort) if cursor else None
+        items = await Product.find_products_page(
+            session,
+            limit=limit,
+            sort=sort,
+            after=after,
+            category_id=category_id,
+            min_price=min_price,
+            max_price=max_price,
+        )
     except SQLAlchemyError:
         raise HTTPException(status_code=500, detail="Ошибка при выполнении запроса")
 
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        value = None if sort == "id" else getattr(last, sort.lstrip("-"))
+        next_cursor = encode_cursor(sort, value, last.id)
+    return ProductsPage.model_validate(
+        {"products": items, "next_cursor": next_cursor}, from_attributes=True
+    )
+
+
+# объявлен раньше /{product_id}, иначе "search" разбирался бы как id
+@products.get("/search", summary="Поиск продуктов по названию")
+async def search_products(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    category_id: Optional[int] = None,
+    session: AsyncSession = Depends(get_read_session),
+) -> ProductsPage:
+    after = decode_cursor(cursor, "search") if cursor else None
+    try:
+        rows = await Product.search(
+            session, q, limit=limit, after=after, category_id=category_id
+        )
+    except SQLAlchemyError:
+        raise HTTPException(status_code=500, detail="Ошибка при выполнении запроса")
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor("search", rows[-1].rank, rows[-1].Products.id)
+    return ProductsPage.model_validate(
+        {"products": [row.Products for row in rows], "next_cursor": next_cursor},
+        from_attributes=True,
+    )
+
 
 @products.get("/{product_id}", summary="Получить позиции по id")
-async def get_products_by_id(product_id: int) -> SProduct | dict:
+async def get_products_by_id(
+    product_id: int, session: AsyncSession = Depends(get_session)
+) -> SProduct | dict:
+
+    async def load_product():
+        product = await Product.find_product_one_or_none_by_id(session, product_id)
+        if product is None:
+            return None
+        return SProduct.model_validate(product).model_dump()
+
     try:
-        product = await Product.find_product_one_or_none_by_id(product_id)
+        product = await cash.get_or_load(product_key(product_id), load_product)
         if not product:
             raise HTTPException(status_code=404, detail="Продукт не найден")
         return product
@@ -32,31 +117,133 @@ async def get_products_by_id(product_id: int) -> SProduct | dict:
 @products.post("/", summary="Добавить новую позицию", status_code=201)
 @require_access_token
 @require_permission("manager.manager")
-async def add_product(request: Request, payload: ProductsPayload):
+async def add_product(
+    request: Request,
+    payload: ProductsPayload,
+    session: AsyncSession = Depends(get_session),
+):
     try:
-        product = await Product.add(**payload.model_dump())
+        product = await Product.add(session, **payload.model_dump())
         if not product:
-            HTTPException(status_code=404, detail="Ошибка при добавлении позиции!")
+            raise HTTPException(
+                status_code=404, detail="Ошибка при добавлении позиции!"
+            )
+        await session.commit()
+        # мог быть закэширован промах по этому id
+        await cash.delete_value(product_key(product.id))
+        await send_kafka_message(
+            value={"event": "PRODUCT_CREATED", "product_id": product.id},
+            key=str(product.id),
+        )
         return {"message": "Позиция успешно добавлена", "Позиция": payload}
     except SQLAlchemyError:
         raise HTTPException(status_code=500, detail="Ошибка при добавлении позиции")
 
 
+@products.post(
+    "/import",
+    summary="Массовый импорт позиций из CSV или NDJSON",
+    response_model=ProductImportReport,
+)
+@require_access_token
+@require_permission("manager.manager")
+async def import_products_route(
+    request: Request,
+    format: Literal["csv", "ndjson"] = "csv",
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Тело запроса — сам файл (не multipart), читается потоком.
+    Строки с ошибками пропускаются и перечисляются в отчёте.
+    """
+    try:
+        report, product_ids = await import_products(session, request.stream(), format)
+        await session.commit()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except SQLAlchemyError:
+        raise HTTPException(status_code=500, detail="Ошибка при импорте позиций")
+    await publish_import(report, product_ids)
+    return report
+
+
+@products.patch(
+    "/bulk",
+    summary="Изменить много позиций одним запросом",
+    response_model=ProductBulkUpdateResponse,
+)
+@require_access_token
+@require_permission("manager.manager")
+async def bulk_update_products(
+    request: Request,
+    payload: ProductBulkUpdatePayload,
+    session: AsyncSession = Depends(get_session),
+):
+    # при повторе id побеждает последняя запись
+    items = {item.id: item for item in payload.items}
+    unchanged = sorted(
+        product_id
+        for product_id, item in items.items()
+        if not item.model_dump(exclude={"id"}, exclude_none=True)
+    )
+    for product_id in unchanged:
+        del items[product_id]
+    if not items:
+        return ProductBulkUpdateResponse(updated=[], not_found=[], unchanged=unchanged)
+    try:
+        updated = await Product.update_many(session, list(items.values()))
+        await session.commit()
+    except IntegrityError:
+        raise HTTPException(status_code=400, detail="Категория не найдена")
+    except SQLAlchemyError:
+        raise HTTPException(status_code=500, detail="Ошибка при выполнении запроса")
+
+    # кэш — одним конвейером, события — одной пачкой, по одному на товар
+    # с ключом product_id, так что при compaction топика остаётся последнее
+    await cash.delete_many(product_key(product_id) for product_id in updated)
+    try:
+        await produce_kafka_batch(
+            [
+                {"event": "PRODUCT_UPDATED", "product_id": product_id}
+                for product_id in updated
+            ],
+            key_field="product_id",
+        )
+    except Exception as e:
+        # изменения уже закоммичены: L1 других экземпляров догонит по TTL
+        logger.error(f"Не удалось отправить события PRODUCT_UPDATED: {e}")
+    updated_ids = set(updated)
+    return ProductBulkUpdateResponse(
+        updated=sorted(updated_ids),
+        not_found=sorted(set(items) - updated_ids),
+        unchanged=unchanged,
+    )
+
+
 @products.put("/{product_id}", summary="Изменить определенную позицию", status_code=201)
 @require_access_token
 @require_permission("manager.manager")
-async def put_product(request: Request, product_id: int, payload: ProductsPayload):
+async def put_product(
+    request: Request,
+    product_id: int,
+    payload: ProductsPayload,
+    session: AsyncSession = Depends(get_session),
+):
     try:
         data = payload.model_dump(exclude_none=True)
         if not data:
             raise HTTPException(status_code=400, detail="Нет данных для обновления")
-        updated = await Product.update_product(product_id, **data)
+        updated = await Product.update_product(session, product_id, **data)
         if not updated:
-            return HTTPException(
+            raise HTTPException(
                 status_code=404, detail=f"Продукт {product_id} не найден"
             )
-        await produce_kafka_message(
-            value={"event": "PRODUCT_UPDATED", "product_id": product_id}
+        # событие уходит и кэш сбрасывается только после коммита
+        await session.commit()
+        await cash.delete_value(product_key(product_id))
+        await send_kafka_message(
+            value={"event": "PRODUCT_UPDATED", "product_id": product_id},
+            key=str(product_id),
         )
         return {"message": "Продукт обновлён"}
     except SQLAlchemyError:
@@ -66,11 +253,19 @@ async def put_product(request: Request, product_id: int, payload: ProductsPayloa
 @products.delete("/{product_id}", summary="Удалить определенную позицию")
 @require_access_token
 @require_permission("manager.manager")
-async def delete_product(request: Request, product_id: int):
+async def delete_product(
+    request: Request, product_id: int, session: AsyncSession = Depends(get_session)
+):
     try:
-        result = await Product.delete_by_id(product_id)
+        result = await Product.delete_by_id(session, product_id)
         if not result:
-            return HTTPException(status_code=404, detail="Ошибка при удалении позиции!")
+            raise HTTPException(status_code=404, detail="Ошибка при удалении позиции!")
+        await session.commit()
+        await cash.delete_value(product_key(product_id))
+        await send_kafka_message(
+            value={"event": "PRODUCT_DELETED", "product_id": product_id},
+            key=str(product_id),
+        )
         return {"message": "Позиция успешно удалена", "Позиция": product_id}
     except SQLAlchemyError:
         raise HTTPException(status_code=500, detail="Ошибка при выполнении запроса")
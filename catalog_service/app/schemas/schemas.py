@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, Field
 
 
@@ -19,7 +19,7 @@ class SCategory(BaseModel):
     )
 
     class Config:
-        orm_mode = True
+        from_attributes = True
 
 
 class SProduct(BaseModel):
@@ -31,4 +31,43 @@ class SProduct(BaseModel):
     category: SCategory
 
     class Config:
-        orm_mode = True
+        from_attributes = True
+
+
+class ProductsPage(BaseModel):
+    products: List[SProduct]
+    next_cursor: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class ProductImportError(BaseModel):
+    line: int
+    error: str
+
+
+class ProductImportReport(BaseModel):
+    received: int
+    inserted: int
+    updated: int
+    error_count: int
+    errors: List[ProductImportError]
+
+
+class ProductBulkUpdateItem(BaseModel):
+    id: int
+    name: Optional[str] = Field(None, min_length=1, max_length=500)
+    price: Optional[float] = Field(None, ge=0, allow_inf_nan=False)
+    category_id: Optional[int] = None
+
+
+class ProductBulkUpdatePayload(BaseModel):
+    items: List[ProductBulkUpdateItem] = Field(..., min_length=1, max_length=10000)
+
+
+class ProductBulkUpdateResponse(BaseModel):
+    updated: List[int]
+    not_found: List[int]
+    # позиции, где кроме id ничего не передано: не обновляются и без событий
+    unchanged: List[int] = []
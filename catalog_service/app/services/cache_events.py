@@ -0,0 +1,67 @@
+import asyncio
+import json
+import socket
+import uuid
+
+from loguru import logger
+
+from app.kafka.kafka_client import create_kafka_consumer
+from app.kafka.kafka_config import settings
+from app.services.cache_service import cash, category_cache, product_key
+
+
+PRODUCT_EVENTS = {"PRODUCT_CREATED", "PRODUCT_UPDATED", "PRODUCT_DELETED"}
+CATEGORY_EVENTS = {"CATEGORY_CREATED", "CATEGORY_UPDATED", "CATEGORY_DELETED"}
+
+RECONNECT_DELAY = 5
+
+
+def apply_event(event: dict):
+    """
+    Сбрасывает записи L1, которые затронуло событие. Redis (L2) сбрасывает
+    тот экземпляр, который сделал изменение, до отправки события.
+    """
+    name = event.get("event")
+    if name in PRODUCT_EVENTS:
+        cash.evict_local(product_key(event["product_id"]))
+    elif name == "PRODUCTS_IMPORTED":
+        # id в событии нет: импорт затрагивает слишком много товаров
+        cash.local.clear()
+    elif name in CATEGORY_EVENTS:
+        category_id = event["category_id"]
+        category_cache.invalidate_local()
+        # в карточке товара лежит его категория
+        cash.local.delete_where(
+            lambda value: isinstance(value, dict)
+            and (value.get("category") or {}).get("id") == category_id
+        )
+
+
+async def run_cache_events_consumer():
+    """
+    Фоновая задача из lifespan: читает product_events в группе, уникальной
+    для экземпляра, так что каждый экземпляр получает все события.
+    Смещения не коммитятся: после переподключения L1 очищается целиком,
+    пропущенные за это время события уже не важны.
+    """
+    group_id = (
+        f"{settings.KAFKA_CACHE_GROUP_PREFIX}-{socket.gethostname()}"
+        f"-{uuid.uuid4().hex[:8]}"
+    )
+    while True:
+        consumer = create_kafka_consumer("product_events", group_id)
+        try:
+            await consumer.start()
+            cash.local.clear()
+            async for message in consumer:
+                try:
+                    apply_event(json.loads(message.value))
+                except Exception as e:
+                    logger.warning(f"Не удалось применить событие кэша: {e}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Ошибка consumer'а событий кэша: {e}")
+        finally:
+            await consumer.stop()
+        await asyncio.sleep(RECONNECT_DELAY)
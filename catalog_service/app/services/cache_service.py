@@ -1,42 +1,390 @@
 from app.redis.redis_client import get_redis
-from typing import Any, Optional
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Iterable, Optional, Tuple
+import asyncio
 import json
+import time
 
+from loguru import logger
+from prometheus_client import Counter
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
 from app.crud.categories import Category
-from app.crud.products import Product
 
 
-class RedisCache:
-    def __init__(self, default_ttl: int = 3600):
-        self.default_ttl = default_ttl  # TTL в секундах (по умолчанию 1 час)
+CACHE_REQUESTS = Counter(
+    "catalog_cache_requests_total", "Catalog cache lookups", ["tier", "result"]
+)
+CACHE_LOADS = Counter(
+    "catalog_cache_loads_total", "Cache misses that went to the database"
+)
+
+# отметка «значения нет»: в Redis хранится как JSON null
+_MISSING = object()
+
+
+# категории: hash id -> JSON категории (+ поле _version) и счётчик версий
+CATEGORIES_KEY = "categories"
+CATEGORIES_VERSION_KEY = "categories:version"
+
+# Запись одной категории. Версия растёт всегда; hash правится, только если
+# он уже заполнен, иначе частичная таблица выглядела бы полной.
+# KEYS: categories, categories:version
+# ARGV: set | del, id, JSON категории
+WRITE_CATEGORY_SCRIPT = """
+local version = redis.call('INCR', KEYS[2])
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    if ARGV[1] == 'set' then
+        redis.call('HSET', KEYS[1], ARGV[2], ARGV[3], '_version', version)
+    else
+        redis.call('HDEL', KEYS[1], ARGV[2])
+        redis.call('HSET', KEYS[1], '_version', version)
+    end
+end
+return version
+"""
+
+# Заполнение из базы. Если за время чтения базы версия сменилась,
+# прочитанное могло устареть, и hash не заполняется.
+# KEYS: categories, categories:version
+# ARGV: версия до чтения базы, ttl, id, JSON, id, JSON, ...
+# HSET идёт пачками по 500 полей: unpack всего ARGV упирается в предел
+# стека Lua уже на нескольких тысячах категорий.
+FILL_CATEGORIES_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+if (redis.call('GET', KEYS[2]) or '0') ~= ARGV[1] then
+    return 0
+end
+redis.call('HSET', KEYS[1], '_version', ARGV[1])
+for i = 3, #ARGV, 1000 do
+    redis.call('HSET', KEYS[1], unpack(ARGV, i, math.min(i + 999, #ARGV)))
+end
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
 
-    async def set_value(self, key: str, data: Category | Product):
+
+def product_key(product_id: int) -> str:
+    return f"product:{product_id}"
+
+
+class LocalCache:
+    """
+    L1: ограниченный LRU в памяти процесса с TTL на каждую запись.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items: OrderedDict[str, Tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
         """
-        Добавить значение в кэш или обновить его.
-        Значение сериализуется в JSON.
+        Значение, _MISSING для закэшированного отсутствия или None при промахе.
         """
-        categories_data = [cat.to_dict() for cat in data]
-        redis = await get_redis()
-        value_str = json.dumps(categories_data)
-        await redis.set(key, value_str, ex=self.default_ttl)
+        item = self._items.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._items[key]
+            return None
+        self._items.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        if self.max_size <= 0:
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        self._items[key] = (time.monotonic() + ttl, value)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    def delete(self, *keys: str):
+        for key in keys:
+            self._items.pop(key, None)
+
+    def delete_where(self, predicate: Callable[[Any], bool]):
+        """
+        Удаляет записи, для значений которых predicate истинен. O(размер L1).
+        """
+        for key in [key for key, (_, value) in self._items.items() if predicate(value)]:
+            del self._items[key]
+
+    def clear(self):
+        self._items.clear()
+
+
+class RedisCache:
+    """
+    Двухуровневый кэш: L1 в памяти процесса перед общим L2 в Redis.
+    get_or_load на промахе обоих уровней загружает значение один раз
+    на ключ (single-flight) и кэширует в том числе отсутствие значения.
+    """
+
+    def __init__(
+        self,
+        default_ttl: int = settings.CACHE_TTL,
+        negative_ttl: int = settings.CACHE_NEGATIVE_TTL,
+    ):
+        self.default_ttl = default_ttl  # TTL в секундах (по умолчанию 1 час)
+        self.negative_ttl = negative_ttl
+        self.local = LocalCache(settings.CACHE_L1_MAX_SIZE, settings.CACHE_L1_TTL)
+        self._inflight: dict[str, asyncio.Future] = {}
+        # ключи, сброшенные во время загрузки: результат такой загрузки
+        # мог быть прочитан до изменения, его не кэшируем
+        self._stale_loads: set[str] = set()
 
     async def get_value(self, key: str) -> Optional[Any]:
         """
         Получить значение из кэша.
         Если ключа нет — вернёт None.
         """
-        redis = await get_redis()
-        value = await redis.get(key)
-        if value is not None:
-            return json.loads(value)
-        return None
+        value = await self._get(key)
+        return None if value is None or value is _MISSING else value
+
+    async def delete_value(self, *keys: str):
+        """
+        Удалить значения из кэша по ключам. Ошибка Redis только логируется:
+        вызывают после коммита, и запись в базе уже состоялась.
+        """
+        self.evict_local(*keys)
+        try:
+            redis = await get_redis()
+            await redis.delete(*keys)
+        except Exception as e:
+            logger.error(f"Не удалось удалить {keys} из кэша: {e}")
 
-    async def delete_value(self, key: str):
+    async def delete_many(self, keys: Iterable[str], chunk_size: int = 1000):
         """
-        Удалить значение из кэша по ключу.
+        Удалить много ключей одним конвейером: DEL пачками по chunk_size,
+        все пачки уходят в Redis за один round trip. Ошибка Redis, как
+        и в delete_value, только логируется.
+        """
+        keys = list(keys)
+        if not keys:
+            return
+        self.evict_local(*keys)
+        try:
+            redis = await get_redis()
+            async with redis.pipeline(transaction=False) as pipe:
+                for start in range(0, len(keys), chunk_size):
+                    pipe.delete(*keys[start : start + chunk_size])
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Не удалось удалить из кэша {len(keys)} ключей: {e}")
+
+    def evict_local(self, *keys: str):
         """
+        Сбросить ключи только в L1 этого процесса (по событиям из Kafka).
+        """
+        self.local.delete(*keys)
+        self._stale_loads.update(key for key in keys if key in self._inflight)
+
+    async def get_or_load(
+        self, key: str, loader: Callable[[], Awaitable[Optional[Any]]]
+    ) -> Optional[Any]:
+        """
+        Значение из L1, затем из Redis, затем из loader().
+        Параллельные промахи по одному ключу ждут одну загрузку.
+        None от loader кэшируется на negative_ttl.
+        """
+        value = await self._get(key)
+        if value is not None:
+            return None if value is _MISSING else value
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            CACHE_LOADS.inc()
+            value = await loader()
+            if key not in self._stale_loads:
+                await self._set(key, value)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # ошибка уходит ожидающим; помечаем её полученной, чтобы asyncio
+            # не ругался, когда ожидающих не было
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+            self._stale_loads.discard(key)
+
+    async def _get(self, key: str) -> Optional[Any]:
+        value = self.local.get(key)
+        if value is not None:
+            CACHE_REQUESTS.labels(tier="l1", result="hit").inc()
+            return value
+        CACHE_REQUESTS.labels(tier="l1", result="miss").inc()
+
+        try:
+            redis = await get_redis()
+            raw = await redis.get(key)
+        except Exception as e:
+            logger.warning(f"Кэш каталога недоступен: {e}")
+            raw = None
+        if raw is None:
+            CACHE_REQUESTS.labels(tier="l2", result="miss").inc()
+            return None
+        CACHE_REQUESTS.labels(tier="l2", result="hit").inc()
+
+        value = json.loads(raw)
+        if value is None:
+            self.local.set(key, _MISSING, self.negative_ttl)
+            return _MISSING
+        self.local.set(key, value)
+        return value
+
+    async def _set(self, key: str, value: Optional[Any]):
+        ttl = self.default_ttl if value is not None else self.negative_ttl
+        self.local.set(key, _MISSING if value is None else value, ttl)
+        try:
+            redis = await get_redis()
+            await redis.set(key, json.dumps(value), ex=ttl)
+        except Exception as e:
+            logger.warning(f"Не удалось записать {key} в кэш: {e}")
+
+
+class CategoryCache:
+    """
+    Все категории одной таблицей: в L1 — словарь id -> категория,
+    в Redis — hash categories. Запись меняет одно поле hash'а,
+    список и категория по id читаются из кэша без похода в базу.
+    TTL hash'а (CACHE_TTL) — страховка на случай сбоя записи в Redis.
+    """
+
+    def __init__(self, cache: RedisCache):
+        self.cache = cache
+        self._lock = asyncio.Lock()
+        self._scripts = {}
+        # растёт при каждом сбросе L1; загрузка, во время которой был
+        # сброс, в L1 не попадает
+        self._generation = 0
+
+    async def _run_script(self, source: str, keys: list, args: list):
         redis = await get_redis()
-        await redis.delete(key)
+        script = self._scripts.get(source)
+        if script is None:
+            script = self._scripts[source] = redis.register_script(source)
+        return await script(keys=keys, args=args, client=redis)
+
+    async def get_all(self, session: AsyncSession) -> dict[int, dict]:
+        table = self.cache.local.get(CATEGORIES_KEY)
+        if table is not None:
+            CACHE_REQUESTS.labels(tier="l1", result="hit").inc()
+            return table
+        CACHE_REQUESTS.labels(tier="l1", result="miss").inc()
+
+        # одна загрузка на процесс, остальные ждут её результата в L1
+        async with self._lock:
+            table = self.cache.local.get(CATEGORIES_KEY)
+            if table is not None:
+                return table
+            generation = self._generation
+            table, cacheable = await self._read_redis(), True
+            if table is None:
+                table, cacheable = await self._load(session)
+            if cacheable and generation == self._generation:
+                self.cache.local.set(CATEGORIES_KEY, table)
+            return table
+
+    async def get(self, session: AsyncSession, category_id: int) -> Optional[dict]:
+        return (await self.get_all(session)).get(category_id)
+
+    async def _read_redis(self) -> Optional[dict[int, dict]]:
+        try:
+            redis = await get_redis()
+            raw = await redis.hgetall(CATEGORIES_KEY)
+        except Exception as e:
+            logger.warning(f"Кэш категорий недоступен: {e}")
+            raw = {}
+        if not raw:
+            CACHE_REQUESTS.labels(tier="l2", result="miss").inc()
+            return None
+        CACHE_REQUESTS.labels(tier="l2", result="hit").inc()
+        raw.pop("_version", None)
+        return {int(key): json.loads(value) for key, value in raw.items()}
+
+    async def _load(self, session: AsyncSession) -> Tuple[dict[int, dict], bool]:
+        """
+        Читает категории из базы и заполняет hash. Второй элемент — можно
+        ли класть результат в L1 (hash заполнен этой загрузкой).
+        """
+        CACHE_LOADS.inc()
+        try:
+            redis = await get_redis()
+            version = await redis.get(CATEGORIES_VERSION_KEY) or "0"
+        except Exception as e:
+            logger.warning(f"Кэш категорий недоступен: {e}")
+            version = None
+
+        table = {
+            category.id: category.to_dict()
+            for category in await Category.find_all(session)
+        }
+        if version is None:
+            return table, False
+
+        args = [version, self.cache.default_ttl]
+        for category_id, category in table.items():
+            args += [category_id, json.dumps(category)]
+        try:
+            filled = await self._run_script(
+                FILL_CATEGORIES_SCRIPT,
+                keys=[CATEGORIES_KEY, CATEGORIES_VERSION_KEY],
+                args=args,
+            )
+        except Exception as e:
+            logger.warning(f"Не удалось заполнить кэш категорий: {e}")
+            filled = 0
+        return table, bool(filled)
+
+    async def put(self, category: dict) -> int:
+        """
+        Записывает одну категорию после коммита. Возвращает новую версию.
+        """
+        return await self._write(
+            "set", category["id"], json.dumps(category, ensure_ascii=False)
+        )
+
+    async def remove(self, category_id: int) -> int:
+        return await self._write("del", category_id, "")
+
+    async def _write(self, op: str, category_id: int, value: str) -> int:
+        self.invalidate_local()
+        try:
+            return await self._run_script(
+                WRITE_CATEGORY_SCRIPT,
+                keys=[CATEGORIES_KEY, CATEGORIES_VERSION_KEY],
+                args=[op, category_id, value],
+            )
+        except Exception as e:
+            logger.error(f"Не удалось обновить кэш категорий: {e}")
+        # лучше перечитать таблицу из базы, чем отдавать устаревшую
+        try:
+            redis = await get_redis()
+            await redis.delete(CATEGORIES_KEY)
+        except Exception as e:
+            logger.error(f"Не удалось сбросить кэш категорий: {e}")
+        return 0
+
+    def invalidate_local(self):
+        self._generation += 1
+        self.cache.local.delete(CATEGORIES_KEY)
 
 
 cash = RedisCache()
+category_cache = CategoryCache(cash)
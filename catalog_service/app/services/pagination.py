@@ -0,0 +1,33 @@
+import base64
+import binascii
+import json
+from typing import Any, Tuple
+
+from fastapi import HTTPException
+
+
+def encode_cursor(sort: str, value: Any, product_id: int) -> str:
+    """
+    Кодирует позицию последнего товара страницы (значение ключа сортировки, id)
+    в непрозрачную строку для параметра cursor. Курсор помнит сортировку,
+    с которой был выдан.
+    """
+    raw = json.dumps([sort, value, product_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str, sort: str) -> Tuple[Any, int]:
+    """
+    Обратное преобразование cursor -> (значение, id).
+    При битом курсоре или курсоре от другой сортировки отдаёт 400.
+    """
+    try:
+        cursor_sort, value, product_id = json.loads(base64.urlsafe_b64decode(cursor))
+        product_id = int(product_id)
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Некорректный cursor")
+    if cursor_sort != sort:
+        raise HTTPException(
+            status_code=400, detail="cursor выдан для другой сортировки"
+        )
+    return value, product_id
@@ -0,0 +1,239 @@
+from typing import AsyncIterator, Callable, List, Literal, Optional, Tuple
+import codecs
+import csv
+import json
+import math
+
+from loguru import logger
+from prometheus_client import Counter
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.kafka.kafka_client import send_kafka_message
+from app.schemas.schemas import ProductImportError, ProductImportReport
+from app.services.cache_service import cash, product_key
+
+
+IMPORT_ROWS = Counter(
+    "product_import_rows_total", "Rows processed by bulk product import", ["result"]
+)
+
+# строк в одном COPY в staging-таблицу
+COPY_BATCH_SIZE = 10000
+# сколько ошибочных строк возвращать в отчёте; считаются все
+MAX_REPORTED_ERRORS = 1000
+
+STAGING_TABLE = "products_import"
+STAGING_COLUMNS = ["line_no", "id", "name", "price", "category_id"]
+
+CREATE_STAGING = text(
+    f"""
+    CREATE TEMP TABLE {STAGING_TABLE} (
+        line_no integer NOT NULL,
+        id integer,
+        name text NOT NULL,
+        price double precision NOT NULL,
+        category_id integer NOT NULL
+    ) ON COMMIT DROP
+    """
+)
+
+# строки, которые нельзя применить, удаляются из staging с причиной
+REJECT_ROWS = [
+    text(
+        f"""
+        DELETE FROM {STAGING_TABLE} AS s
+        WHERE NOT EXISTS (SELECT 1 FROM categories AS c WHERE c.id = s.category_id)
+        RETURNING s.line_no, 'категория ' || s.category_id || ' не найдена'
+        """
+    ),
+    # новые товары получают id из последовательности; чужой id привёл бы
+    # к конфликту с ней позже
+    text(
+        f"""
+        DELETE FROM {STAGING_TABLE} AS s
+        WHERE s.id IS NOT NULL
+          AND NOT EXISTS (SELECT 1 FROM products AS p WHERE p.id = s.id)
+        RETURNING s.line_no, 'товар ' || s.id || ' не найден'
+        """
+    ),
+    # один товар дважды в файле: побеждает последняя строка
+    text(
+        f"""
+        DELETE FROM {STAGING_TABLE} AS s
+        WHERE s.id IS NOT NULL
+          AND EXISTS (
+              SELECT 1 FROM {STAGING_TABLE} AS t
+              WHERE t.id = s.id AND t.line_no > s.line_no
+          )
+        RETURNING s.line_no, 'товар ' || s.id || ' перекрыт более поздней строкой'
+        """
+    ),
+]
+
+UPSERT = text(
+    f"""
+    INSERT INTO products (id, name, price, category_id)
+    SELECT coalesce(id, nextval(pg_get_serial_sequence('products', 'id'))),
+           name, price, category_id
+    FROM {STAGING_TABLE}
+    ORDER BY line_no
+    ON CONFLICT (id) DO UPDATE
+    SET name = excluded.name,
+        price = excluded.price,
+        category_id = excluded.category_id
+    RETURNING id, (xmax = 0) AS inserted
+    """
+)
+
+
+Row = Tuple[Optional[int], str, float, int]
+
+
+def _product_row(data: dict) -> Row:
+    name = (data.get("name") or "").strip()
+    if not name:
+        raise ValueError("пустое name")
+    price = float(data["price"])
+    if not math.isfinite(price) or price < 0:
+        raise ValueError(f"некорректная цена {price}")
+    product_id = data.get("id")
+    return (
+        int(product_id) if product_id not in (None, "") else None,
+        name,
+        price,
+        int(data["category_id"]),
+    )
+
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """
+    Строки из потока байт по мере поступления, без чтения файла целиком.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    tail = ""
+    async for chunk in chunks:
+        lines = (tail + decoder.decode(chunk)).split("\n")
+        tail = lines.pop()
+        for line in lines:
+            yield line.rstrip("\r")
+    tail += decoder.decode(b"", final=True)
+    if tail:
+        yield tail.rstrip("\r")
+
+
+async def parse_rows(
+    chunks: AsyncIterator[bytes], fmt: Literal["csv", "ndjson"]
+) -> AsyncIterator[Tuple[int, Optional[Row], Optional[str]]]:
+    """
+    (номер строки, строка товара, ошибка) для каждой непустой строки файла.
+    CSV — с заголовком (name, price, category_id и необязательный id),
+    одна запись на строку. NDJSON — объект с теми же полями на строку.
+    """
+    header = None
+    line_no = 0
+    async for line in _lines(chunks):
+        line_no += 1
+        if not line.strip():
+            continue
+        if fmt == "csv" and header is None:
+            header = [column.strip() for column in next(csv.reader([line]))]
+            missing = {"name", "price", "category_id"} - set(header)
+            if missing:
+                raise ValueError(f"В заголовке CSV нет колонок {sorted(missing)}")
+            continue
+        try:
+            if fmt == "ndjson":
+                data = json.loads(line)
+                if not isinstance(data, dict):
+                    raise ValueError("ожидался JSON-объект")
+            else:
+                data = dict(zip(header, next(csv.reader([line]))))
+            yield line_no, _product_row(data), None
+        except (ValueError, TypeError, KeyError) as e:
+            yield line_no, None, f"{type(e).__name__}: {e}"
+
+
+async def import_products(
+    session: AsyncSession,
+    chunks: AsyncIterator[bytes],
+    fmt: Literal["csv", "ndjson"],
+    on_progress: Optional[Callable[[int], None]] = None,
+) -> Tuple[ProductImportReport, List[int]]:
+    """
+    Потоково загружает файл в staging-таблицу через COPY пачками
+    по COPY_BATCH_SIZE, отбраковывает строки, которые нельзя применить,
+    и одним INSERT ... ON CONFLICT (id) DO UPDATE переносит остальные
+    в products. Транзакцией управляет вызывающий. Возвращает отчёт
+    и id затронутых товаров.
+    """
+    connection = await session.connection()
+    raw = (await connection.get_raw_connection()).driver_connection
+    await session.execute(CREATE_STAGING)
+
+    received = 0
+    errors: List[Tuple[int, str]] = []
+    batch = []
+
+    async def copy_batch():
+        await raw.copy_records_to_table(
+            STAGING_TABLE, records=batch, columns=STAGING_COLUMNS
+        )
+        batch.clear()
+        logger.info(f"Импорт товаров: загружено {received} строк")
+        if on_progress is not None:
+            on_progress(received)
+
+    async for line_no, row, error in parse_rows(chunks, fmt):
+        received += 1
+        if error is not None:
+            errors.append((line_no, error))
+            continue
+        batch.append((line_no, *row))
+        if len(batch) >= COPY_BATCH_SIZE:
+            await copy_batch()
+    if batch:
+        await copy_batch()
+
+    for query in REJECT_ROWS:
+        result = await session.execute(query)
+        errors.extend(tuple(row) for row in result)
+
+    result = await session.execute(UPSERT)
+    affected = result.all()
+    inserted = sum(1 for row in affected if row.inserted)
+    updated = len(affected) - inserted
+
+    IMPORT_ROWS.labels(result="inserted").inc(inserted)
+    IMPORT_ROWS.labels(result="updated").inc(updated)
+    IMPORT_ROWS.labels(result="error").inc(len(errors))
+
+    errors.sort()
+    report = ProductImportReport(
+        received=received,
+        inserted=inserted,
+        updated=updated,
+        error_count=len(errors),
+        errors=[
+            ProductImportError(line=line, error=error)
+            for line, error in errors[:MAX_REPORTED_ERRORS]
+        ],
+    )
+    return report, [row.id for row in affected]
+
+
+async def publish_import(report: ProductImportReport, product_ids: List[int]):
+    """
+    После коммита: один конвейер удалений в кэше (в том числе закэшированных
+    промахов по новым id) и одно событие PRODUCTS_IMPORTED вместо события
+    на каждый товар.
+    """
+    await cash.delete_many(product_key(product_id) for product_id in product_ids)
+    await send_kafka_message(
+        value={
+            "event": "PRODUCTS_IMPORTED",
+            "inserted": report.inserted,
+            "updated": report.updated,
+        },
+        key="products:import",
+    )
@@ -0,0 +1,43 @@
+"""products search indexes
+
+Revision ID: 5e8a2d1c7f40
+Revises: 9c1f4e7a2b3d
+Create Date: 2026-10-18 15:21:37.880412
+
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "5e8a2d1c7f40"
+down_revision = "9c1f4e7a2b3d"
+branch_labels = None
+depends_on = None
+
+
+# Выражение должно совпадать с Product.search_vector() в app/crud/products.py,
+# иначе планировщик не возьмёт индекс.
+SEARCH_VECTOR = "to_tsvector('russian'::regconfig, name)"
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # индексы по выражениям, без новой колонки: products не переписывается.
+    # CONCURRENTLY, чтобы не блокировать запись; вне транзакции миграции.
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_products_name_fts "
+            f"ON products USING gin ({SEARCH_VECTOR})"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_products_name_trgm "
+            "ON products USING gin (name gin_trgm_ops)"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_products_name_trgm")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_products_name_fts")
+    # расширение не удаляем: им могут пользоваться и другие объекты
@@ -0,0 +1,51 @@
+"""products listing indexes
+
+Revision ID: 9c1f4e7a2b3d
+Revises: e84eb4dedeba
+Create Date: 2026-10-18 14:02:51.604127
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "9c1f4e7a2b3d"
+down_revision = "e84eb4dedeba"
+branch_labels = None
+depends_on = None
+
+
+# индексы под keyset-пагинацию GET /products/: (фильтр, ключ сортировки, id).
+# Сортировка -price читает те же индексы в обратном порядке.
+INDEXES = [
+    ("ix_products_category_id_id", ["category_id", "id"]),
+    ("ix_products_category_id_price_id", ["category_id", "price", "id"]),
+    ("ix_products_price_id", ["price", "id"]),
+    ("ix_products_name_id", ["name", "id"]),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY, чтобы не блокировать запись в products;
+    # такой индекс нельзя строить внутри транзакции миграции.
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES:
+            op.create_index(
+                name,
+                "products",
+                columns,
+                unique=False,
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name="products",
+                postgresql_concurrently=True,
+            )
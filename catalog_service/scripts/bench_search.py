@@ -0,0 +1,156 @@
+"""
+Бенчмарк поиска GET /products/search на синтетическом каталоге.
+
+Наливает в транзакции --products товаров (по умолчанию миллион) в отдельную
+категорию, прогоняет запросы, которые строит Product.search, через
+EXPLAIN ANALYZE и печатает p50/p95 времени выполнения и использованные
+индексы. Для сравнения те же запросы повторяются с выключенными
+индексными сканами. Транзакция в конце откатывается.
+
+Запуск из каталога catalog_service:
+    python -m scripts.bench_search --products 1000000 --runs 20
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+
+from app.crud.products import Product
+from app.db import engine
+
+
+INDEX_SCANS = {"Index Scan", "Index Only Scan", "Bitmap Index Scan"}
+
+# названия вида "Чайник Bosch белый 123456"
+SEED_PRODUCTS = text(
+    """
+    INSERT INTO products (name, price, category_id)
+    SELECT (ARRAY['Чайник', 'Кофеварка', 'Тостер', 'Блендер', 'Миксер',
+                  'Пылесос', 'Утюг', 'Фен', 'Холодильник', 'Микроволновка',
+                  'Телевизор', 'Ноутбук', 'Смартфон', 'Наушники', 'Колонка'])
+               [1 + g % 15]
+           || ' ' ||
+           (ARRAY['Bosch', 'Philips', 'Samsung', 'Xiaomi', 'Tefal', 'Braun',
+                  'Redmond', 'Polaris', 'LG', 'Sony'])[1 + (g / 15) % 10]
+           || ' ' ||
+           (ARRAY['белый', 'чёрный', 'серебристый', 'красный', 'синий'])
+               [1 + (g / 150) % 5]
+           || ' ' || g,
+           round((random() * 100000)::numeric, 2),
+           :category_id
+    FROM generate_series(1, :products) AS g
+    """
+)
+
+# (название, фраза): точное совпадение слов, несколько слов, опечатка, часть слова
+QUERIES = [
+    ("одно слово", "чайник"),
+    ("несколько слов", "кофеварка philips белый"),
+    ("опечатка", "кофеварко"),
+    ("часть слова", "xiao"),
+]
+
+
+def render(stmt) -> str:
+    return str(
+        stmt.compile(
+            dialect=postgresql.asyncpg.dialect(),
+            compile_kwargs={"literal_binds": True},
+        )
+    )
+
+
+def walk(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from walk(child)
+
+
+async def explain(conn, sql: str) -> dict:
+    result = await conn.execute(text(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}"))
+    # asyncpg отдаёт json-колонку строкой
+    return json.loads(result.scalar_one())[0]
+
+
+async def measure(conn, sql: str, runs: int):
+    timings = []
+    for _ in range(runs):
+        report = await explain(conn, sql)
+        timings.append(report["Execution Time"])
+    indexes = {
+        node.get("Index Name", "?")
+        for node in walk(report["Plan"])
+        if node["Node Type"] in INDEX_SCANS
+    }
+    p50 = statistics.median(timings)
+    p95 = statistics.quantiles(timings, n=20)[-1] if runs > 1 else timings[0]
+    return p50, p95, sorted(indexes)
+
+
+async def main(args) -> int:
+    async with engine.connect() as conn:
+        trans = await conn.begin()
+        try:
+            started = time.monotonic()
+            category_id = (
+                await conn.execute(
+                    text(
+                        "INSERT INTO categories (name) VALUES ('bench_search') "
+                        "RETURNING id"
+                    )
+                )
+            ).scalar_one()
+            await conn.execute(
+                SEED_PRODUCTS, {"products": args.products, "category_id": category_id}
+            )
+            await conn.execute(text("ANALYZE products"))
+            print(
+                f"Налито {args.products} товаров за "
+                f"{time.monotonic() - started:.1f} с\n"
+            )
+
+            ok = True
+            for name, phrase in QUERIES:
+                for filtered in (False, True):
+                    stmt = Product._search_query(
+                        phrase, category_id=category_id if filtered else None
+                    ).limit(args.page_size + 1)
+                    sql = render(stmt)
+                    title = f"{name} «{phrase}»" + (" + категория" if filtered else "")
+
+                    p50, p95, indexes = await measure(conn, sql, args.runs)
+                    await conn.execute(text("SET LOCAL enable_indexscan = off"))
+                    await conn.execute(text("SET LOCAL enable_bitmapscan = off"))
+                    seq_p50, _, _ = await measure(conn, sql, args.seq_runs)
+                    await conn.execute(text("RESET enable_indexscan"))
+                    await conn.execute(text("RESET enable_bitmapscan"))
+
+                    search_indexes = [
+                        i for i in indexes if i.startswith("ix_products_name_")
+                    ]
+                    ok = ok and bool(search_indexes)
+                    print(
+                        f"{title}\n"
+                        f"    с индексами: p50 {p50:.1f} мс, p95 {p95:.1f} мс; "
+                        f"индексы: {', '.join(indexes) or '-'}\n"
+                        f"    без индексов: p50 {seq_p50:.1f} мс"
+                    )
+        finally:
+            await trans.rollback()
+    await engine.dispose()
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--seq-runs", type=int, default=3, help="прогонов без индексов")
+    parser.add_argument("--page-size", type=int, default=50)
+    sys.exit(asyncio.run(main(parser.parse_args())))
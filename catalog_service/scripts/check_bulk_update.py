@@ -0,0 +1,124 @@
+"""
+Проверка PATCH /products/bulk на пачке максимального размера.
+
+Собирает ProductBulkUpdatePayload с предельным числом позиций, у каждой
+заданы все поля, и проверяет, что запрос Product.update_many укладывается
+в предел asyncpg на число параметров. С --execute запрос ещё и выполняется
+в транзакции на налитых товарах, которая в конце откатывается.
+
+Запуск из каталога catalog_service:
+    python -m scripts.check_bulk_update
+    python -m scripts.check_bulk_update --execute
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+from annotated_types import MaxLen
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+
+from app.crud.products import Product
+from app.db import async_session_maker, engine
+from app.schemas.schemas import ProductBulkUpdatePayload
+
+
+# предел asyncpg (и протокола Postgres) на число параметров запроса
+MAX_QUERY_ARGS = 32767
+
+SEED_PRODUCTS = text(
+    """
+    INSERT INTO products (name, price, category_id)
+    SELECT 'bench_bulk ' || g, 1, :category_id
+    FROM generate_series(1, :products) AS g
+    RETURNING id
+    """
+)
+
+
+def max_items() -> int:
+    field = ProductBulkUpdatePayload.model_fields["items"]
+    return next(m.max_length for m in field.metadata if isinstance(m, MaxLen))
+
+
+def build_payload(ids, category_id: int) -> ProductBulkUpdatePayload:
+    return ProductBulkUpdatePayload(
+        items=[
+            {
+                "id": product_id,
+                "name": f"bench_bulk {product_id} v2",
+                "price": 2.5,
+                "category_id": category_id,
+            }
+            for product_id in ids
+        ]
+    )
+
+
+def check_compiled(payload: ProductBulkUpdatePayload) -> bool:
+    compiled = Product._update_many_query(payload.items).compile(
+        dialect=postgresql.asyncpg.dialect()
+    )
+    params = len(compiled.positiontup)
+    ok = params <= MAX_QUERY_ARGS
+    status = "OK  " if ok else "FAIL"
+    print(
+        f"[{status}] {len(payload.items)} позиций: {params} параметров "
+        f"(предел {MAX_QUERY_ARGS})"
+    )
+    return ok
+
+
+async def execute(size: int) -> bool:
+    async with engine.connect() as conn:
+        trans = await conn.begin()
+        try:
+            async with async_session_maker(bind=conn) as session:
+                category_id = (
+                    await session.execute(
+                        text(
+                            "INSERT INTO categories (name) VALUES ('bench_bulk') "
+                            "RETURNING id"
+                        )
+                    )
+                ).scalar_one()
+                ids = (
+                    (
+                        await session.execute(
+                            SEED_PRODUCTS,
+                            {"products": size, "category_id": category_id},
+                        )
+                    )
+                    .scalars()
+                    .all()
+                )
+                payload = build_payload(ids, category_id)
+                started = time.monotonic()
+                updated = await Product.update_many(session, payload.items)
+                elapsed = time.monotonic() - started
+        finally:
+            await trans.rollback()
+    await engine.dispose()
+
+    ok = sorted(updated) == sorted(ids)
+    status = "OK  " if ok else "FAIL"
+    print(f"[{status}] обновлено {len(updated)} из {len(ids)} за {elapsed:.2f} с")
+    return ok
+
+
+def main(args) -> int:
+    size = max_items()
+    ok = check_compiled(build_payload(range(1, size + 1), category_id=1))
+    if args.execute:
+        ok = asyncio.run(execute(size)) and ok
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--execute", action="store_true", help="выполнить запрос на базе"
+    )
+    sys.exit(main(parser.parse_args()))
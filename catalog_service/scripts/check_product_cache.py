@@ -0,0 +1,77 @@
+"""
+Проверка GET /products/{product_id} на холодном и прогретом кэше.
+
+Наливает в транзакции категорию и товар, сбрасывает его ключ в обоих
+уровнях кэша и дважды вызывает обработчик маршрута: первый вызов идёт
+в базу и собирает SProduct из ORM-объекта, второй отдаётся из кэша.
+Оба ответа сверяются с налитыми данными. Транзакция в конце откатывается,
+ключ товара из кэша удаляется.
+
+Запуск из каталога catalog_service:
+    python -m scripts.check_product_cache
+"""
+
+import argparse
+import asyncio
+import sys
+
+from sqlalchemy import text
+
+from app.db import async_session_maker, engine
+from app.redis.redis_client import close_redis
+from app.routes.products import get_products_by_id
+from app.services.cache_service import cash, product_key
+
+
+async def main(args) -> int:
+    product_id = None
+    async with engine.connect() as conn:
+        trans = await conn.begin()
+        try:
+            async with async_session_maker(bind=conn) as session:
+                category_id = (
+                    await session.execute(
+                        text(
+                            "INSERT INTO categories (name) "
+                            "VALUES ('check_product_cache') RETURNING id"
+                        )
+                    )
+                ).scalar_one()
+                product_id = (
+                    await session.execute(
+                        text(
+                            "INSERT INTO products (name, price, category_id) "
+                            "VALUES ('check_product_cache', 42.5, :category_id) "
+                            "RETURNING id"
+                        ),
+                        {"category_id": category_id},
+                    )
+                ).scalar_one()
+                expected = {
+                    "id": product_id,
+                    "name": "check_product_cache",
+                    "price": 42.5,
+                    "category": {"id": category_id, "name": "check_product_cache"},
+                }
+
+                key = product_key(product_id)
+                await cash.delete_value(key)
+                ok = True
+                for name in ("холодный кэш", "прогретый кэш"):
+                    product = await get_products_by_id(product_id, session=session)
+                    passed = product == expected
+                    ok = ok and passed
+                    status = "OK  " if passed else "FAIL"
+                    print(f"[{status}] {name}: {product}")
+        finally:
+            await trans.rollback()
+            if product_id is not None:
+                await cash.delete_value(product_key(product_id))
+    await close_redis()
+    await engine.dispose()
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,76 @@
+"""
+Массовый импорт товаров из CSV или NDJSON через COPY.
+
+То же, что POST /products/import, но из файла на диске: строки уходят
+в staging-таблицу пачками, затем одним upsert в products. В конце —
+один сброс кэша и одно событие PRODUCTS_IMPORTED. Ошибочные строки
+печатаются в stderr, код выхода 1, если они были.
+
+Запуск из каталога catalog_service:
+    python -m scripts.import_products feed.csv
+    python -m scripts.import_products feed.ndjson --format ndjson
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+from app.db import async_session_maker, engine
+from app.kafka.kafka_client import init_kafka_producer, stop_kafka_producer
+from app.redis.redis_client import close_redis
+from app.services.product_import import import_products, publish_import
+
+
+CHUNK_SIZE = 1024 * 1024
+
+
+async def read_chunks(path: Path):
+    with path.open("rb") as file:
+        while chunk := file.read(CHUNK_SIZE):
+            yield chunk
+
+
+def print_progress(received: int):
+    print(f"\rзагружено строк: {received}", end="", file=sys.stderr, flush=True)
+
+
+async def main(args) -> int:
+    path = Path(args.path)
+    fmt = args.format or ("ndjson" if path.suffix in (".ndjson", ".jsonl") else "csv")
+
+    await init_kafka_producer()
+    try:
+        async with async_session_maker() as session:
+            async with session.begin():
+                report, product_ids = await import_products(
+                    session, read_chunks(path), fmt, on_progress=print_progress
+                )
+        print(file=sys.stderr)
+        await publish_import(report, product_ids)
+    finally:
+        await stop_kafka_producer()
+        await close_redis()
+        await engine.dispose()
+
+    for error in report.errors:
+        print(f"строка {error.line}: {error.error}", file=sys.stderr)
+    if report.error_count > len(report.errors):
+        print(
+            f"... и ещё {report.error_count - len(report.errors)} ошибок",
+            file=sys.stderr,
+        )
+    print(
+        f"прочитано {report.received}, добавлено {report.inserted}, "
+        f"обновлено {report.updated}, ошибок {report.error_count}"
+    )
+    return 1 if report.error_count else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path")
+    parser.add_argument(
+        "--format", choices=["csv", "ndjson"], help="по умолчанию — по расширению"
+    )
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -1,6 +1,6 @@
-from sqlalchemy import update
+from sqlalchemy import and_, select, update
 
-from app.models.db import ExchangeRate, Orders
+from app.models.db import ExchangeRate, OrderLocations, Orders
 from app.db import session_maker
 
 
@@ -11,11 +11,24 @@ def save_exchange_rate(currency_pair: str, rate: float) -> None:
         session.commit()
 
 
+def _order_by_id(order_id: int):
+    """
+    Условие на заказ по id, как OrderService._by_id в orders_service:
+    created_at из order_locations оставляет при выполнении одну секцию.
+    """
+    located_at = (
+        select(OrderLocations.created_at)
+        .where(OrderLocations.id == order_id)
+        .scalar_subquery()
+    )
+    return and_(Orders.id == order_id, Orders.created_at == located_at)
+
+
 def update_order_estimated_cost(order_id: int, estimated_cost: float) -> None:
     with session_maker() as session:
         session.execute(
             update(Orders)
-            .where(Orders.id == order_id)
+            .where(_order_by_id(order_id))
             .values(estimated_cost=estimated_cost)
         )
         session.commit()
@@ -2,7 +2,7 @@ from sqlalchemy import Column, Integer, String, Float, DateTime
 from sqlalchemy.orm import Mapped, mapped_column
 from datetime import datetime, timezone
 
-from app.db import Base, int_pk
+from app.db import Base
 
 
 class ExchangeRate(Base):
@@ -20,5 +20,21 @@ class ExchangeRate(Base):
 class Orders(Base):
     __tablename__ = "orders"
 
-    id: Mapped[int_pk]
+    # orders секционирована по created_at, он входит в первичный ключ
+    id: Mapped[int] = mapped_column(primary_key=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), primary_key=True
+    )
     estimated_cost: Mapped[float] = mapped_column(Float)
+
+
+class OrderLocations(Base):
+    """
+    id заказа -> created_at, то есть секция orders, где он лежит.
+    Ведётся триггером в базе orders_service.
+    """
+
+    __tablename__ = "order_locations"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
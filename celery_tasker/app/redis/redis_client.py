@@ -1,33 +1,31 @@
 from typing import Optional
 
-import redis
-from redis import Redis
-from loguru import logger
+from redis import BlockingConnectionPool, Redis
 
-from app.redis.redis_config import get_redis_url
+from app.redis.redis_config import get_redis_url, settings
 
 redis_client: Optional[Redis] = None
 
 
-def reconnect_redis():
-    global redis_client
-    if redis_client:
-        try:
-            redis_client.close()
-        except Exception as e:
-            logger.error(f"Error while closing Redis: {e}")
-    redis_client = redis.Redis.from_url(get_redis_url(), decode_responses=True)
-    logger.info("Redis reconnected.")
-
-
 def get_redis() -> Redis:
+    """
+    Общий клиент поверх пула соединений, без PING на каждый вызов.
+    Простоявшие соединения пул проверяет сам (health_check_interval),
+    после fork воркера Celery пул переоткрывает соединения в дочернем процессе.
+    """
     global redis_client
     if redis_client is None:
-        redis_client = redis.Redis.from_url(get_redis_url(), decode_responses=True)
-
-    try:
-        redis_client.ping()
-    except Exception:
-        reconnect_redis()
-
+        # при исчерпании пула ждём свободное соединение, а не падаем сразу
+        pool = BlockingConnectionPool.from_url(
+            get_redis_url(),
+            decode_responses=True,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            timeout=settings.REDIS_POOL_TIMEOUT,
+            health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_keepalive=True,
+            retry_on_timeout=True,
+        )
+        redis_client = Redis(connection_pool=pool)
     return redis_client
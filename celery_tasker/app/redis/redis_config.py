@@ -7,6 +7,10 @@ class Redis_Settings(BaseSettings):
     REDIS_PORT: int
     REDIS_DB: int = 0
     REDIS_PASSWORD: str
+    REDIS_MAX_CONNECTIONS: int = 100
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30
+    REDIS_SOCKET_TIMEOUT: float = 5
+    REDIS_POOL_TIMEOUT: float = 5
 
     model_config = SettingsConfigDict(
         env_file=Path(__file__).parent.parent.parent / ".env", extra="ignore"
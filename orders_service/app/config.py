@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pathlib import Path
+from typing import Optional
 
 
 class Settings(BaseSettings):
@@ -8,6 +9,21 @@ class Settings(BaseSettings):
     DB_NAME: str
     DB_USER: str
     DB_PASSWORD: str
+    # реплика только для чтения; без DB_REPLICA_HOST всё идёт в primary
+    DB_REPLICA_HOST: Optional[str] = None
+    DB_REPLICA_PORT: Optional[int] = None
+    # отставание реплики (с), после которого чтения уходят в primary
+    DB_REPLICA_MAX_LAG: float = 5.0
+    DB_REPLICA_LAG_CHECK_INTERVAL: float = 1.0
+    # пул соединений; реплика получает такой же
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    OUTBOX_BATCH_SIZE: int = 500
+    OUTBOX_POLL_INTERVAL: float = 0.5
+    ORDER_CACHE_TTL: int = 300
     model_config = SettingsConfigDict(
         env_file=Path(__file__).parent.parent / ".env", extra="ignore"
     )
@@ -21,3 +37,13 @@ def get_db_url():
         f"postgresql+asyncpg://{settings.DB_USER}:{settings.DB_PASSWORD}@"
         f"{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}"
     )
+
+
+def get_replica_db_url() -> Optional[str]:
+    if not settings.DB_REPLICA_HOST:
+        return None
+    port = settings.DB_REPLICA_PORT or settings.DB_PORT
+    return (
+        f"postgresql+asyncpg://{settings.DB_USER}:{settings.DB_PASSWORD}@"
+        f"{settings.DB_REPLICA_HOST}:{port}/{settings.DB_NAME}"
+    )
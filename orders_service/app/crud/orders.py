@@ -1,11 +1,29 @@
-from typing import List
-from decimal import Decimal
+from typing import AsyncIterator, List, Optional, Sequence, Tuple
+from datetime import datetime
+from uuid import UUID
 
-from app.db import async_session_maker
-from app.models.db import Orders, OrderItems
-from app.schemas.schemas import OrderUpdatePayload
+from app.db import read_session
+from app.crud.outbox import OutboxService
+from app.crud.stats import OrderStatsService
+from app.models.db import OrderLocations, Orders, OrderItems
+from app.schemas.schemas import OrderItemUpdatePayload, OrderUpdatePayload
 
-from sqlalchemy import select, delete
+from sqlalchemy import (
+    Float,
+    Integer,
+    and_,
+    cast,
+    column,
+    delete,
+    func,
+    insert,
+    literal,
+    select,
+    tuple_,
+    update,
+    values,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from fastapi import HTTPException
 
@@ -14,108 +32,364 @@ class OrderService:
     model = Orders
 
     @classmethod
-    async def add(cls, user_id: str, items: List[dict], status_id: int = 0):
-        async with async_session_maker() as session:
-            async with session.begin():
-                total_price = sum(
-                    item["price_at_moment"] * item["quantity"] for item in items
-                )
+    async def add(
+        cls,
+        session: AsyncSession,
+        user_id: str,
+        items: List[dict],
+        status_id: int = 0,
+    ):
+        total_price = sum(item["price_at_moment"] * item["quantity"] for item in items)
 
-                new_order = cls.model(
-                    user_id=user_id,
-                    status_id=status_id,
-                    total_price=total_price,
-                )
-                session.add(new_order)
-                await session.flush()
-
-                order_items = [
-                    OrderItems(
-                        order_id=new_order.id,
-                        product_id=item["product_id"],
-                        quantity=item["quantity"],
-                        price_at_moment=item["price_at_moment"],
-                    )
-                    for item in items
-                ]
-                session.add_all(order_items)
+        new_order = cls.model(
+            user_id=user_id,
+            status_id=status_id,
+            total_price=total_price,
+        )
+        session.add(new_order)
+        await session.flush()
+
+        order_items = [
+            OrderItems(
+                order_id=new_order.id,
+                product_id=item["product_id"],
+                quantity=item["quantity"],
+                price_at_moment=item["price_at_moment"],
+            )
+            for item in items
+        ]
+        session.add_all(order_items)
+        await OrderStatsService.apply(
+            session,
+            [(new_order.user_id, new_order.created_at, 1, total_price)],
+        )
+        await OutboxService.add_events(
+            session,
+            [
+                {
+                    "event": "ORDER_CREATED",
+                    "order_id": new_order.id,
+                    "price": new_order.total_price,
+                }
+            ],
+        )
+        await session.flush()
+        return new_order
+
+    @classmethod
+    async def add_bulk(cls, session: AsyncSession, orders: List[dict]):
+        """
+        Создаёт пачку заказов одной транзакцией: заказы — одним многострочным
+        INSERT ... RETURNING, товары всех заказов — одним executemany,
+        события ORDER_CREATED — в outbox.
+        Возвращает строки (id, user_id, total_price, created_at)
+        в порядке входного списка.
+        """
+        order_rows = [
+            {
+                "user_id": order["user_id"],
+                "status_id": order["status_id"],
+                "total_price": sum(
+                    item["price_at_moment"] * item["quantity"]
+                    for item in order["items"]
+                ),
+            }
+            for order in orders
+        ]
+        result = await session.execute(
+            insert(cls.model).returning(
+                cls.model.id,
+                cls.model.user_id,
+                cls.model.total_price,
+                cls.model.created_at,
+                sort_by_parameter_order=True,
+            ),
+            order_rows,
+        )
+        created = result.all()
 
-            await session.refresh(new_order)
-            return new_order
+        item_rows = [
+            {"order_id": row.id, **item}
+            for row, order in zip(created, orders)
+            for item in order["items"]
+        ]
+        if item_rows:
+            await session.execute(insert(OrderItems), item_rows)
+        await OrderStatsService.apply(
+            session,
+            [(row.user_id, row.created_at, 1, row.total_price) for row in created],
+        )
+        await OutboxService.add_events(
+            session,
+            [
+                {
+                    "event": "ORDER_CREATED",
+                    "order_id": row.id,
+                    "price": row.total_price,
+                }
+                for row in created
+            ],
+        )
+        return created
 
     @classmethod
-    async def get_user_orders(cls, user_id: int):
-        async with async_session_maker() as session:
-            stmt = (
-                select(cls.model)
-                .options(selectinload(cls.model.items))  # получ содержимое заказа
-                .where(cls.model.user_id == user_id)
+    def _user_orders_query(
+        cls, user_id: UUID, after: Optional[Tuple[datetime, int]] = None
+    ):
+        # новые заказы первыми; (created_at, id) — ключ для keyset-пагинации
+        stmt = (
+            select(cls.model)
+            .options(selectinload(cls.model.items))  # получ содержимое заказа
+            .where(cls.model.user_id == user_id)
+            .order_by(cls.model.created_at.desc(), cls.model.id.desc())
+        )
+        if after is not None:
+            created_at, order_id = after
+            cursor_created_at = literal(created_at, cls.model.created_at.type)
+            stmt = stmt.where(
+                tuple_(cls.model.created_at, cls.model.id)
+                < tuple_(cursor_created_at, literal(order_id, cls.model.id.type)),
+                # по сравнению кортежей секции не отсекаются, нужно явное
+                # условие на ключ секционирования
+                cls.model.created_at <= cursor_created_at,
             )
-            result = await session.execute(stmt)
-            orders = result.scalars().all()
+        return stmt
 
-            return orders
+    @classmethod
+    async def get_user_orders(
+        cls,
+        session: AsyncSession,
+        user_id: UUID,
+        limit: int,
+        after: Optional[Tuple[datetime, int]] = None,
+    ):
+        """
+        Страница заказов пользователя размером не больше limit + 1.
+        Лишний заказ в конце означает, что есть следующая страница.
+        """
+        stmt = cls._user_orders_query(user_id, after).limit(limit + 1)
+        result = await session.execute(stmt)
+        orders = result.scalars().all()
+
+        return orders
 
     @classmethod
-    async def get_order(cls, order_id: int):
-        async with async_session_maker() as session:
-            stmt = (
-                select(cls.model)
-                .options(selectinload(cls.model.items))
-                .where(cls.model.id == order_id)
+    async def stream_user_orders(
+        cls, user_id: UUID, chunk_size: int
+    ) -> AsyncIterator[Sequence[Orders]]:
+        """
+        Отдаёт заказы пользователя пачками по chunk_size через серверный курсор,
+        не собирая всю историю в памяти. Своя сессия на чтение (реплика, если
+        она не отстаёт): ответ стримится уже после того, как сессия запроса
+        закрыта.
+        """
+        async with read_session() as session:
+            result = await session.stream_scalars(
+                cls._user_orders_query(user_id).execution_options(yield_per=chunk_size)
             )
-            result = await session.execute(stmt)
-            order = result.scalars().first()
+            async for chunk in result.partitions():
+                yield chunk
 
-            return order
+    @classmethod
+    def _by_id(cls, order_id: int):
+        """
+        Условие на заказ по id. created_at подставляется из order_locations,
+        так что при выполнении остаётся одна секция, а не индекс каждой.
+        """
+        located_at = (
+            select(OrderLocations.created_at)
+            .where(OrderLocations.id == order_id)
+            .scalar_subquery()
+        )
+        return and_(cls.model.id == order_id, cls.model.created_at == located_at)
 
     @classmethod
-    async def delete(cls, order_id: int):
-        async with async_session_maker() as session:
-            async with session.begin():
-                stmt = delete(cls.model).where(cls.model.id == order_id)
-                result = await session.execute(stmt)
-                return result
+    async def get_order(cls, session: AsyncSession, order_id: int):
+        stmt = (
+            select(cls.model)
+            .options(selectinload(cls.model.items))
+            .where(cls._by_id(order_id))
+        )
+        result = await session.execute(stmt)
+        order = result.scalars().first()
+
+        return order
 
     @classmethod
-    async def update(cls, order_id: int, payload: OrderUpdatePayload):
-        async with async_session_maker() as session:
-            async with session.begin():
-                # грузим заказ + товары
-                stmt = (
-                    select(cls.model)
-                    .options(selectinload(cls.model.items))
-                    .where(cls.model.id == order_id)
+    async def delete(cls, session: AsyncSession, order_id: int):
+        """
+        Удаляет заказ, вычитает его из сводок и пишет ORDER_DELETED в outbox.
+        Возвращает удалённую строку или None, если заказа не было.
+        """
+        stmt = (
+            delete(cls.model)
+            .where(cls._by_id(order_id))
+            .returning(cls.model.user_id, cls.model.total_price, cls.model.created_at)
+        )
+        result = await session.execute(stmt)
+        deleted = result.one_or_none()
+        if deleted is None:
+            return
+        # каскада в базе нет: orders секционирована и FK на неё не ссылается
+        await session.execute(delete(OrderItems).where(OrderItems.order_id == order_id))
+        await OrderStatsService.apply(
+            session,
+            [(deleted.user_id, deleted.created_at, -1, -deleted.total_price)],
+        )
+        await OrderStatsService.refresh_last_order(session, deleted.user_id)
+        # relay по этому событию ещё раз сбросит кэш заказа, см. outbox_relay
+        await OutboxService.add_events(
+            session, [{"event": "ORDER_DELETED", "order_id": order_id}]
+        )
+        return deleted
+
+    @classmethod
+    async def update(
+        cls, session: AsyncSession, order_id: int, payload: OrderUpdatePayload
+    ):
+        """
+        Обновляет статус и позиции заказа. Все изменения позиций применяются
+        одним UPDATE ... FROM (VALUES ...), а total_price пересчитывается
+        агрегатом в том же запросе. Возвращает order_id или None, если заказа нет.
+        """
+        # блокируем заказ, чтобы параллельные PUT не пересчитали сумму поверх друг друга
+        result = await session.execute(
+            select(cls.model.user_id, cls.model.total_price, cls.model.created_at)
+            .where(cls._by_id(order_id))
+            .with_for_update()
+        )
+        order = result.one_or_none()
+        if order is None:
+            return
+
+        # позиции индексируем по id; при повторе item_id побеждает последний
+        items = {item.item_id: item for item in payload.items or []}
+        if items:
+            result = await session.execute(
+                select(OrderItems.id).where(
+                    OrderItems.order_id == order_id,
+                    OrderItems.id.in_(items),
                 )
-                result = await session.execute(stmt)
-                order = result.scalars().first()
-                if not order:
-                    return
-                if payload.status_id is not None:
-                    order.status_id = payload.status_id
-                need_recalculate = False
-                if payload.items:
-                    for item_data in payload.items:
-                        found = False
-                        for item in order.items:
-                            if item.id == item_data.item_id:
-                                found = True
-                                if item_data.quantity is not None:
-                                    item.quantity = item_data.quantity
-                                    need_recalculate = True
-                                if item_data.price_at_moment is not None:
-                                    item.price_at_moment = item_data.price_at_moment
-                                    need_recalculate = True
-                        if not found:
-                            raise HTTPException(
-                                status_code=404,
-                                detail=f"Товар с id {item_data.item_id} не найден в заказе",
-                            )
-                # пересчитать total_price если надо
-                if need_recalculate:
-                    order.total_price = sum(
-                        Decimal(item.quantity) * Decimal(item.price_at_moment)
-                        for item in order.items
+            )
+            existing = set(result.scalars())
+            for item_id in items:
+                if item_id not in existing:
+                    raise HTTPException(
+                        status_code=404,
+                        detail=f"Товар с id {item_id} не найден в заказе",
                     )
-            await session.refresh(order)
-            return order
+
+        order_values = {}
+        if payload.status_id is not None:
+            order_values["status_id"] = payload.status_id
+        stmt = update(cls.model).where(
+            cls.model.id == order_id, cls.model.created_at == order.created_at
+        )
+
+        changed = [
+            item
+            for item in items.values()
+            if item.quantity is not None or item.price_at_moment is not None
+        ]
+        if changed:
+            updated_items = cls._update_items_cte(order_id, changed)
+            stmt = stmt.add_cte(updated_items)
+            # CTE не видна основному запросу через order_items,
+            # поэтому сумма = нетронутые позиции + то, что вернул UPDATE
+            untouched_total = (
+                select(
+                    func.coalesce(
+                        func.sum(OrderItems.quantity * OrderItems.price_at_moment),
+                        0,
+                    )
+                )
+                .where(
+                    OrderItems.order_id == order_id,
+                    OrderItems.id.not_in(select(updated_items.c.id)),
+                )
+                .scalar_subquery()
+            )
+            updated_total = select(
+                func.coalesce(
+                    func.sum(
+                        updated_items.c.quantity * updated_items.c.price_at_moment
+                    ),
+                    0,
+                )
+            ).scalar_subquery()
+            order_values["total_price"] = untouched_total + updated_total
+
+        if order_values:
+            result = await session.execute(
+                stmt.values(**order_values).returning(cls.model.total_price)
+            )
+            total_price = result.scalar_one()
+            if total_price != order.total_price:
+                await OrderStatsService.apply(
+                    session,
+                    [
+                        (
+                            order.user_id,
+                            order.created_at,
+                            0,
+                            total_price - order.total_price,
+                        )
+                    ],
+                )
+
+        await OutboxService.add_events(
+            session,
+            [
+                {
+                    "event": "ORDER_UPDATED",
+                    "order_id": order_id,
+                    str(order_id): payload.model_dump_json(),
+                }
+            ],
+        )
+        return order_id
+
+    @staticmethod
+    def _update_items_cte(order_id: int, items: List[OrderItemUpdatePayload]):
+        """
+        UPDATE order_items ... FROM (VALUES ...) RETURNING для всех изменённых
+        позиций разом; NULL в VALUES оставляет поле как есть.
+        """
+        new_items = values(
+            column("id", Integer),
+            column("quantity", Integer),
+            column("price_at_moment", Float),
+            name="new_items",
+        ).data(
+            [
+                (
+                    item.item_id,
+                    item.quantity,
+                    (
+                        float(item.price_at_moment)
+                        if item.price_at_moment is not None
+                        else None
+                    ),
+                )
+                for item in items
+            ]
+        )
+        return (
+            update(OrderItems)
+            .where(
+                OrderItems.id == new_items.c.id,
+                OrderItems.order_id == order_id,
+            )
+            .values(
+                # cast: колонка VALUES из одних NULL иначе выводится как text
+                quantity=func.coalesce(
+                    cast(new_items.c.quantity, Integer), OrderItems.quantity
+                ),
+                price_at_moment=func.coalesce(
+                    cast(new_items.c.price_at_moment, Float),
+                    OrderItems.price_at_moment,
+                ),
+            )
+            .returning(OrderItems.id, OrderItems.quantity, OrderItems.price_at_moment)
+            .cte("updated_items")
+        )
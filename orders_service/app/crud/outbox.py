@@ -0,0 +1,41 @@
+from typing import List
+
+from sqlalchemy import select, insert, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.db import OrderOutbox
+
+
+class OutboxService:
+    model = OrderOutbox
+
+    @classmethod
+    async def add_events(
+        cls, session: AsyncSession, events: List[dict], topic: str = "order_events"
+    ):
+        """
+        Кладёт события в outbox в рамках уже открытой транзакции session.
+        """
+        if events:
+            await session.execute(
+                insert(cls.model),
+                [{"topic": topic, "payload": event} for event in events],
+            )
+
+    @classmethod
+    async def lock_batch(cls, session: AsyncSession, limit: int) -> List[OrderOutbox]:
+        """
+        Забирает самые старые события под FOR UPDATE SKIP LOCKED,
+        чтобы несколько инстансов relay не отправляли одно и то же.
+        """
+        result = await session.execute(
+            select(cls.model)
+            .order_by(cls.model.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        return result.scalars().all()
+
+    @classmethod
+    async def delete_batch(cls, session: AsyncSession, ids: List[int]):
+        await session.execute(delete(cls.model).where(cls.model.id.in_(ids)))
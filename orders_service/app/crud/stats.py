@@ -0,0 +1,129 @@
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from typing import Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.db import DailyOrderStats, Orders, UserOrderStats
+
+
+# (user_id, created_at заказа, изменение количества, изменение суммы)
+StatsDelta = Tuple[UUID, datetime, int, float]
+
+
+def utc_day(moment: datetime) -> date:
+    """
+    День, в сводку за который попадает заказ: границы суток по UTC.
+    """
+    return moment.astimezone(timezone.utc).date()
+
+
+class OrderStatsService:
+    user_model = UserOrderStats
+    daily_model = DailyOrderStats
+
+    @classmethod
+    async def apply(cls, session: AsyncSession, deltas: Iterable[StatsDelta]):
+        """
+        Применяет изменения заказов к сводкам в рамках транзакции session.
+        Дельты сворачиваются по пользователю и дню, затем каждая таблица
+        обновляется одним многострочным INSERT ... ON CONFLICT DO UPDATE.
+        Строки идут в порядке ключа, чтобы параллельные транзакции брали
+        блокировки в одном порядке и не ловили deadlock.
+        """
+        users = defaultdict(lambda: [0, 0.0, None])
+        days = defaultdict(lambda: [0, 0.0])
+        for user_id, created_at, count, amount in deltas:
+            user = users[user_id]
+            user[0] += count
+            user[1] += amount
+            if count > 0:
+                user[2] = created_at if user[2] is None else max(user[2], created_at)
+            day = days[utc_day(created_at)]
+            day[0] += count
+            day[1] += amount
+        if not users:
+            return
+
+        stmt = insert(cls.user_model).values(
+            [
+                {
+                    "user_id": user_id,
+                    "orders_count": count,
+                    "total_spent": amount,
+                    "last_order_at": last_order_at,
+                }
+                for user_id, (count, amount, last_order_at) in sorted(users.items())
+            ]
+        )
+        await session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[cls.user_model.user_id],
+                set_={
+                    "orders_count": cls.user_model.orders_count
+                    + stmt.excluded.orders_count,
+                    "total_spent": cls.user_model.total_spent
+                    + stmt.excluded.total_spent,
+                    # greatest() пропускает NULL, если дельта не про новый заказ
+                    "last_order_at": func.greatest(
+                        cls.user_model.last_order_at, stmt.excluded.last_order_at
+                    ),
+                },
+            )
+        )
+
+        stmt = insert(cls.daily_model).values(
+            [
+                {"day": day, "orders_count": count, "revenue": amount}
+                for day, (count, amount) in sorted(days.items())
+            ]
+        )
+        await session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[cls.daily_model.day],
+                set_={
+                    "orders_count": cls.daily_model.orders_count
+                    + stmt.excluded.orders_count,
+                    "revenue": cls.daily_model.revenue + stmt.excluded.revenue,
+                },
+            )
+        )
+
+    @classmethod
+    async def refresh_last_order(cls, session: AsyncSession, user_id: UUID):
+        """
+        После удаления заказа максимум по created_at не выводится из дельты,
+        берём его заново — это top-1 по индексу (user_id, created_at DESC).
+        """
+        await session.execute(
+            update(cls.user_model)
+            .where(cls.user_model.user_id == user_id)
+            .values(
+                last_order_at=select(func.max(Orders.created_at))
+                .where(Orders.user_id == user_id)
+                .scalar_subquery()
+            )
+        )
+
+    @classmethod
+    async def get_user_stats(
+        cls, session: AsyncSession, user_id: UUID
+    ) -> Optional[UserOrderStats]:
+        result = await session.execute(
+            select(cls.user_model).where(cls.user_model.user_id == user_id)
+        )
+        return result.scalar_one_or_none()
+
+    @classmethod
+    async def get_daily_stats(
+        cls, session: AsyncSession, date_from: date, date_to: date
+    ) -> List[DailyOrderStats]:
+        result = await session.execute(
+            select(cls.daily_model)
+            .where(cls.daily_model.day.between(date_from, date_to))
+            .order_by(cls.daily_model.day)
+        )
+        return result.scalars().all()
@@ -1,17 +1,157 @@
+import asyncio
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
 from datetime import datetime
-from typing import Annotated
+from typing import Annotated, AsyncIterator
 
-from sqlalchemy import func
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncAttrs
+from loguru import logger
+from sqlalchemy import func, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import (
+    create_async_engine,
+    async_sessionmaker,
+    AsyncAttrs,
+    AsyncEngine,
+    AsyncSession,
+)
 from sqlalchemy.orm import DeclarativeBase, declared_attr, mapped_column
 
-from app.config import get_db_url
+from app.config import get_db_url, get_replica_db_url, settings
+from app.db_pool import instrumented_pool_class, register_pool_metrics
+
+
+def create_pooled_engine(url: str, label: str) -> AsyncEngine:
+    engine = create_async_engine(
+        url,
+        poolclass=instrumented_pool_class(label),
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+    register_pool_metrics(engine, label)
+    return engine
 
 
 DATABASE_URL = get_db_url()
-engine = create_async_engine(DATABASE_URL)
+engine = create_pooled_engine(DATABASE_URL, "primary")
 async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
 
+REPLICA_DATABASE_URL = get_replica_db_url()
+replica_engine = (
+    create_pooled_engine(REPLICA_DATABASE_URL, "replica")
+    if REPLICA_DATABASE_URL
+    else None
+)
+replica_session_maker = (
+    async_sessionmaker(replica_engine, expire_on_commit=False)
+    if replica_engine is not None
+    else None
+)
+
+# Если реплика проиграла весь WAL, который успела получить, она не отстаёт,
+# даже когда последняя транзакция была давно (на простаивающем primary).
+REPLICA_LAG_QUERY = text(
+    """
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE coalesce(
+            extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0
+        )
+    END
+    """
+)
+_replica_state = {"fresh": False, "checked_at": float("-inf")}
+
+
+async def replica_is_fresh() -> bool:
+    """
+    Отставание реплики не больше DB_REPLICA_MAX_LAG.
+    Результат проверки кешируется на DB_REPLICA_LAG_CHECK_INTERVAL,
+    недоступная реплика считается отставшей.
+    """
+    if replica_engine is None:
+        return False
+    now = time.monotonic()
+    if now - _replica_state["checked_at"] < settings.DB_REPLICA_LAG_CHECK_INTERVAL:
+        return _replica_state["fresh"]
+    # отмечаем сразу, чтобы параллельные запросы не проверяли реплику хором
+    _replica_state["checked_at"] = now
+    try:
+        async with replica_engine.connect() as conn:
+            lag = (await conn.execute(REPLICA_LAG_QUERY)).scalar_one()
+        fresh = lag <= settings.DB_REPLICA_MAX_LAG
+        if not fresh:
+            logger.warning(f"Реплика отстаёт на {lag:.1f} с, читаем из primary")
+    except (SQLAlchemyError, OSError, asyncio.TimeoutError) as e:
+        logger.warning(f"Реплика недоступна, читаем из primary: {e}")
+        fresh = False
+    _replica_state["fresh"] = fresh
+    return fresh
+
+
+@asynccontextmanager
+async def read_session() -> AsyncIterator[AsyncSession]:
+    """
+    Сессия для запросов только на чтение: реплика, если она настроена
+    и не отстаёт, иначе primary.
+    """
+    if await replica_is_fresh():
+        session_maker = replica_session_maker
+    else:
+        session_maker = async_session_maker
+    async with session_maker() as session:
+        yield session
+
+
+async def get_session() -> AsyncIterator[AsyncSession]:
+    """
+    Зависимость FastAPI: одна сессия и одна транзакция на запрос.
+    Коммит после успешного обработчика, откат при любом исключении.
+    Обработчик может закоммитить раньше сам, если после записи ему
+    нужны побочные эффекты вне базы (кэш, Kafka).
+    """
+    async with async_session_maker() as session:
+        try:
+            yield session
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+
+
+async def get_read_session() -> AsyncIterator[AsyncSession]:
+    """
+    Зависимость для обработчиков только на чтение, см. read_session.
+    """
+    async with read_session() as session:
+        yield session
+
+
+async def warm_up_pools():
+    """
+    Открывает DB_POOL_SIZE соединений заранее, чтобы первые запросы после
+    старта не платили за установку соединений. Ошибка не мешает старту:
+    пул доберёт соединения по мере надобности.
+    """
+    for name, pooled_engine in (("primary", engine), ("replica", replica_engine)):
+        if pooled_engine is None:
+            continue
+        try:
+            async with AsyncExitStack() as stack:
+                for _ in range(settings.DB_POOL_SIZE):
+                    await stack.enter_async_context(pooled_engine.connect())
+        except (SQLAlchemyError, OSError, asyncio.TimeoutError) as e:
+            logger.warning(f"Не удалось прогреть пул {name}: {e}")
+
+
+async def dispose_engines():
+    await engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
+
+
 int_pk = Annotated[int, mapped_column(primary_key=True)]
 created_at = Annotated[datetime, mapped_column(server_default=func.now())]
 updated_at = Annotated[
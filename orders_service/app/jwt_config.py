@@ -5,6 +5,10 @@ from pathlib import Path
 class Settings(BaseSettings):
     JWT_SECRET: str
     JWT_ALGORITHM: str
+    # сколько проверенных access-токенов держать в памяти процесса
+    ACCESS_TOKEN_CACHE_SIZE: int = 10000
+    # как часто сверять таблицу role_id -> разрешения с Redis, секунды
+    PERMISSION_TABLE_TTL: float = 30
     model_config = SettingsConfigDict(
         env_file=Path(__file__).parent.parent / ".env", extra="ignore"
     )
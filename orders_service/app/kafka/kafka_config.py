@@ -8,6 +8,10 @@ class KafkaSettings(BaseSettings):
     KAFKA_SASL_MECHANISM: str | None = None
     KAFKA_USERNAME: str | None = None
     KAFKA_PASSWORD: str | None = None
+    KAFKA_LINGER_MS: int = 5
+    KAFKA_MAX_BATCH_SIZE: int = 65536
+    KAFKA_COMPRESSION_TYPE: str | None = "lz4"  # lz4 | zstd | gzip | None
+    KAFKA_MAX_IN_FLIGHT: int = 10000
 
     model_config = SettingsConfigDict(
         env_file=Path(__file__).parent.parent.parent / ".env", extra="ignore"
@@ -1,4 +1,5 @@
 import time
+import asyncio
 
 from fastapi import FastAPI, Request
 from contextlib import asynccontextmanager
@@ -6,7 +7,11 @@ from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_
 from starlette.responses import Response
 
 from app.routes.orders import orders
+from app.routes.stats import stats
 from app.kafka.kafka_client import init_kafka_producer, stop_kafka_producer
+from app.services.outbox_relay import run_outbox_relay
+from app.db import warm_up_pools, dispose_engines
+from app.redis.redis_client import close_redis, run_redis_health_check
 from app.logger import setup_logger
 
 setup_logger()
@@ -16,11 +21,25 @@ from loguru import logger
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    logger.info("Прогрев пула соединений с БД")
+    await warm_up_pools()
     logger.info("инициализация кафки")
     await init_kafka_producer()
+    logger.info("Запуск outbox relay")
+    relay = asyncio.create_task(run_outbox_relay())
+    redis_health = asyncio.create_task(run_redis_health_check())
     yield
+    logger.info("Остановка outbox relay")
+    for task in (relay, redis_health):
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
     logger.info("Останока кафки")
     await stop_kafka_producer()
+    await close_redis()
+    await dispose_engines()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -60,3 +79,4 @@ async def index():
 
 
 app.include_router(orders)
+app.include_router(stats)
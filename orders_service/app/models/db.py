@@ -1,10 +1,10 @@
 import uuid
 
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy import ForeignKey, DateTime, Float
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy import ForeignKey, DateTime, Date, Float, BigInteger, Index, text
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from sqlalchemy.sql import func
-from datetime import datetime
+from datetime import date, datetime
 from app.db import Base, int_pk, str_uniq
 
 
@@ -26,24 +26,41 @@ class OrderStatuses(Base):
 
 class Orders(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        # заказы пользователя в порядке keyset-пагинации
+        Index(
+            "ix_orders_user_id_created_at_id",
+            "user_id",
+            text("created_at DESC"),
+            text("id DESC"),
+        ),
+        # месячные секции по created_at, см. migration 4d63a150735a
+        # и scripts/partitions.py
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
-    id: Mapped[int_pk]
+    # в составном ключе SERIAL для id нужно указывать явно
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
     status_id: Mapped[int] = mapped_column(
         ForeignKey("order_statuses.id", ondelete="SET NULL"), nullable=True
     )
     estimated_cost: Mapped[float] = mapped_column(Float)
     total_price: Mapped[float] = mapped_column(Float)
+    # первичный ключ секционированной таблицы обязан включать created_at
     created_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), server_default=func.now()
+        DateTime(timezone=True), server_default=func.now(), primary_key=True
     )
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), onupdate=func.now(), server_default=func.now()
     )
 
     status: Mapped["OrderStatuses"] = relationship(back_populates="orders")
+    # внешнего ключа на секционированную orders нет, связь задана явно
     items: Mapped[list["OrderItems"]] = relationship(
-        back_populates="order", cascade="all, delete-orphan", passive_deletes=True
+        back_populates="order",
+        primaryjoin="Orders.id == foreign(OrderItems.order_id)",
+        cascade="all, delete-orphan",
     )
 
     def __repr__(self):
@@ -54,12 +71,15 @@ class OrderItems(Base):
     __tablename__ = "order_items"
 
     id: Mapped[int_pk]
-    order_id: Mapped[int] = mapped_column(ForeignKey("orders.id", ondelete="CASCADE"))
+    order_id: Mapped[int] = mapped_column(index=True)
     product_id: Mapped[int]
     quantity: Mapped[int]
     price_at_moment: Mapped[float] = mapped_column(Float)
 
-    order: Mapped["Orders"] = relationship(back_populates="items")
+    order: Mapped["Orders"] = relationship(
+        back_populates="items",
+        primaryjoin="Orders.id == foreign(OrderItems.order_id)",
+    )
 
     def __repr__(self):
         return (
@@ -67,3 +87,77 @@ class OrderItems(Base):
             f"product_id={self.product_id}, quantity={self.quantity}, "
             f"price_at_moment={self.price_at_moment})>"
         )
+
+
+class OrderLocations(Base):
+    """
+    id заказа -> created_at, то есть секция orders, где он лежит.
+    Заполняется триггером orders_track_location, см. migration 7a2c9e41b8d6.
+    """
+
+    __tablename__ = "order_locations"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+
+    def __repr__(self):
+        return f"<OrderLocation(id={self.id}, created_at={self.created_at})>"
+
+
+class OrderOutbox(Base):
+    """
+    Исходящие события заказов. Пишутся в той же транзакции, что и сам заказ,
+    в Kafka их переносит фоновый relay (app/services/outbox_relay.py).
+    """
+
+    __tablename__ = "order_outbox"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    topic: Mapped[str]
+    payload: Mapped[dict] = mapped_column(JSONB)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+
+    def __repr__(self):
+        return f"<OrderOutbox(id={self.id}, topic={self.topic})>"
+
+
+class UserOrderStats(Base):
+    """
+    Сводка по заказам пользователя, обновляется инкрементально
+    в транзакциях OrderService (app/crud/stats.py).
+    """
+
+    __tablename__ = "user_order_stats"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    orders_count: Mapped[int] = mapped_column(server_default="0")
+    total_spent: Mapped[float] = mapped_column(Float, server_default="0")
+    last_order_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+
+    def __repr__(self):
+        return (
+            f"<UserOrderStats(user_id={self.user_id}, "
+            f"orders_count={self.orders_count}, total_spent={self.total_spent})>"
+        )
+
+
+class DailyOrderStats(Base):
+    """
+    Выручка и количество заказов по дням (UTC), обновляется инкрементально.
+    """
+
+    __tablename__ = "daily_order_stats"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    orders_count: Mapped[int] = mapped_column(server_default="0")
+    revenue: Mapped[float] = mapped_column(Float, server_default="0")
+
+    def __repr__(self):
+        return (
+            f"<DailyOrderStats(day={self.day}, "
+            f"orders_count={self.orders_count}, revenue={self.revenue})>"
+        )
@@ -1,8 +1,13 @@
+from typing import AsyncIterator, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.schemas.schemas import (
+    BulkOrderPayload,
+    BulkOrderCreateResponse,
     NewOrderPayload,
     OrderCreateResponse,
     UserOrdersResponse,
@@ -10,12 +15,18 @@ from app.schemas.schemas import (
     OrderUpdatePayload,
 )
 from app.crud.orders import OrderService
-from app.kafka.kafka_client import produce_kafka_message
+from app.db import get_read_session, get_session
 from app.services.check_token_service import require_access_token, require_permission
+from app.services.pagination import encode_cursor, decode_cursor
+from app.services.cache_service import order_cache
 
 
 orders = APIRouter(prefix="/orders", tags=["Работа с заказами"])
 
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+STREAM_CHUNK_SIZE = 500
+
 
 @orders.get(
     "/by_user/{user_id}",
@@ -24,11 +35,41 @@ orders = APIRouter(prefix="/orders", tags=["Работа с заказами"])
 )
 @require_access_token
 @require_permission("user.user")
-async def get_order_by_user_id(request: Request, user_id: UUID):
-    orders = await OrderService.get_user_orders(user_id)
-    if not orders:
+async def get_order_by_user_id(
+    request: Request,
+    user_id: UUID,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    stream: bool = Query(False, description="Отдать всю историю как NDJSON"),
+    session: AsyncSession = Depends(get_read_session),
+):
+    if stream:
+        return StreamingResponse(
+            _stream_user_orders(user_id), media_type="application/x-ndjson"
+        )
+
+    after = decode_cursor(cursor) if cursor else None
+    orders = await OrderService.get_user_orders(
+        session, user_id, limit=limit, after=after
+    )
+    if not orders and after is None:
         raise HTTPException(status_code=404, detail="Заказы не найдены")
-    return UserOrdersResponse(orders=orders)
+
+    next_cursor = None
+    if len(orders) > limit:
+        orders = orders[:limit]
+        next_cursor = encode_cursor(orders[-1].created_at, orders[-1].id)
+    return UserOrdersResponse(orders=orders, next_cursor=next_cursor)
+
+
+async def _stream_user_orders(user_id: UUID) -> AsyncIterator[str]:
+    async for chunk in OrderService.stream_user_orders(
+        user_id, chunk_size=STREAM_CHUNK_SIZE
+    ):
+        yield "".join(
+            OrderResponse.model_validate(order).model_dump_json() + "\n"
+            for order in chunk
+        )
 
 
 @orders.get(
@@ -36,20 +77,34 @@ async def get_order_by_user_id(request: Request, user_id: UUID):
 )
 @require_access_token
 @require_permission("user.user")
-async def get_order_by_order_id(request: Request, order_id: int):
-    order = await OrderService.get_order(order_id)
+async def get_order_by_order_id(
+    request: Request,
+    order_id: int,
+    session: AsyncSession = Depends(get_read_session),
+):
+    cached = await order_cache.get_order(order_id)
+    if cached is not None:
+        return cached
+    order = await OrderService.get_order(session, order_id)
     if not order:
         raise HTTPException(status_code=404, detail="Заказ не найден")
-    return OrderResponse.model_validate(order)
+    response = OrderResponse.model_validate(order)
+    await order_cache.set_order(order_id, response)
+    return response
 
 
 @orders.delete("/{order_id}", status_code=204, summary="Удалить заказ")
 @require_access_token
 @require_permission("manager.manager")
-async def delete_order(request: Request, order_id: int):
-    result = await OrderService.delete(order_id)
-    if result.rowcount == 0:
+async def delete_order(
+    request: Request, order_id: int, session: AsyncSession = Depends(get_session)
+):
+    deleted = await OrderService.delete(session, order_id)
+    if not deleted:
         raise HTTPException(status_code=404, detail="Заказ не найден")
+    # кэш чистим после коммита, иначе промах успеет прочитать старую строку
+    await session.commit()
+    await order_cache.invalidate(order_id)
     return
 
 
@@ -61,7 +116,11 @@ async def delete_order(request: Request, order_id: int):
 )
 @require_access_token
 @require_permission("user.user")
-async def add_new_order(request: Request, payload: NewOrderPayload):
+async def add_new_order(
+    request: Request,
+    payload: NewOrderPayload,
+    session: AsyncSession = Depends(get_session),
+):
     items_data = [
         {
             "product_id": item.product_id,
@@ -72,14 +131,7 @@ async def add_new_order(request: Request, payload: NewOrderPayload):
     ]
 
     new_order = await OrderService.add(
-        user_id=payload.user_id, items=items_data, status_id=payload.status_id
-    )
-    await produce_kafka_message(
-        value={
-            "event": "ORDER_CREATED",
-            "order_id": new_order.id,
-            "price": new_order.total_price,
-        }
+        session, user_id=payload.user_id, items=items_data, status_id=payload.status_id
     )
     return {
         "message": "Заказ успешно создан",
@@ -88,14 +140,56 @@ async def add_new_order(request: Request, payload: NewOrderPayload):
     }
 
 
+@orders.post(
+    "/bulk",
+    summary="Создать пачку заказов",
+    status_code=201,
+    response_model=BulkOrderCreateResponse,
+)
+@require_access_token
+@require_permission("manager.manager")
+async def add_orders_bulk(
+    request: Request,
+    payload: BulkOrderPayload,
+    session: AsyncSession = Depends(get_session),
+):
+    orders_data = [
+        {
+            "user_id": order.user_id,
+            "status_id": order.status_id,
+            "items": [
+                {
+                    "product_id": item.product_id,
+                    "quantity": item.quantity,
+                    "price_at_moment": float(item.price_at_moment),
+                }
+                for item in order.items
+            ],
+        }
+        for order in payload.orders
+    ]
+
+    created = await OrderService.add_bulk(session, orders_data)
+    return {
+        "message": f"Создано заказов: {len(created)}",
+        "orders": [
+            {"order_id": row.id, "total_price": row.total_price} for row in created
+        ],
+    }
+
+
 @orders.put("/{order_id}", summary="Изменить заказ", status_code=201)
 @require_access_token
 @require_permission("manager.manager")
-async def put_order(request: Request, order_id: int, payload: OrderUpdatePayload):
-    updated_order = await OrderService.update(order_id, payload)
+async def put_order(
+    request: Request,
+    order_id: int,
+    payload: OrderUpdatePayload,
+    session: AsyncSession = Depends(get_session),
+):
+    updated_order = await OrderService.update(session, order_id, payload)
     if not updated_order:
         raise HTTPException(status_code=404, detail="Заказ не найден")
-    await produce_kafka_message(
-        value={"event": "ORDER_UPDATED", order_id: payload.model_dump_json()}
-    )
+    await session.commit()
+    await order_cache.invalidate(order_id)
     return {"message": f"Заказ {order_id} успешно обновлен"}
@@ -0,0 +1,53 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.schemas.schemas import DailyOrderStatsResponse, UserOrderStatsResponse
+from app.crud.stats import OrderStatsService, utc_day
+from app.db import get_read_session
+from app.services.check_token_service import require_access_token, require_permission
+
+
+stats = APIRouter(prefix="/orders/stats", tags=["Статистика заказов"])
+
+MAX_DAILY_RANGE = timedelta(days=366)
+
+
+@stats.get(
+    "/by_user/{user_id}",
+    summary="Сводка по заказам пользователя",
+    response_model=UserOrderStatsResponse,
+)
+@require_access_token
+@require_permission("user.user")
+async def get_user_stats(
+    request: Request, user_id: UUID, session: AsyncSession = Depends(get_read_session)
+):
+    user_stats = await OrderStatsService.get_user_stats(session, user_id)
+    if not user_stats:
+        raise HTTPException(status_code=404, detail="Заказы не найдены")
+    return user_stats
+
+
+@stats.get(
+    "/daily",
+    summary="Выручка и количество заказов по дням",
+    response_model=List[DailyOrderStatsResponse],
+)
+@require_access_token
+@require_permission("manager.manager")
+async def get_daily_stats(
+    request: Request,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    session: AsyncSession = Depends(get_read_session),
+):
+    # «сегодня» по тем же суткам UTC, что и сводка, а не по часам сервера
+    date_to = date_to or utc_day(datetime.now(timezone.utc))
+    date_from = date_from or date_to - timedelta(days=30)
+    if date_from > date_to or date_to - date_from > MAX_DAILY_RANGE:
+        raise HTTPException(status_code=400, detail="Некорректный период")
+    return await OrderStatsService.get_daily_stats(session, date_from, date_to)
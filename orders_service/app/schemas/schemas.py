@@ -1,7 +1,7 @@
 from uuid import UUID
 from typing import List, Optional
 from decimal import Decimal
-from datetime import datetime
+from datetime import date, datetime
 
 from pydantic import BaseModel, Field
 
@@ -33,6 +33,20 @@ class OrderCreateResponse(BaseModel):
         from_attributes = True
 
 
+class BulkOrderPayload(BaseModel):
+    orders: List[NewOrderPayload] = Field(min_length=1, max_length=5000)
+
+
+class BulkOrderCreatedItem(BaseModel):
+    order_id: int
+    total_price: Decimal
+
+
+class BulkOrderCreateResponse(BaseModel):
+    message: str
+    orders: List[BulkOrderCreatedItem]
+
+
 class OrderItemResponse(BaseModel):
     product_id: int
     quantity: int
@@ -55,6 +69,7 @@ class OrderResponse(BaseModel):
 
 class UserOrdersResponse(BaseModel):
     orders: List[OrderResponse]
+    next_cursor: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -75,3 +90,22 @@ class OrderUpdatePayload(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class UserOrderStatsResponse(BaseModel):
+    user_id: UUID
+    orders_count: int
+    total_spent: Decimal
+    last_order_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class DailyOrderStatsResponse(BaseModel):
+    day: date
+    orders_count: int
+    revenue: Decimal
+
+    class Config:
+        from_attributes = True
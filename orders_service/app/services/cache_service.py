@@ -0,0 +1,80 @@
+from typing import Optional
+import asyncio
+import json
+
+from loguru import logger
+from prometheus_client import Counter
+
+from app.config import settings
+from app.db import replica_engine
+from app.redis.redis_client import get_redis
+from app.schemas.schemas import OrderResponse
+
+
+ORDER_CACHE_REQUESTS = Counter(
+    "order_cache_requests_total", "Order cache lookups", ["result"]
+)
+
+
+class OrderCache:
+    def __init__(self, default_ttl: int = settings.ORDER_CACHE_TTL):
+        self.default_ttl = default_ttl
+        self._delayed: set[asyncio.Task] = set()
+
+    @staticmethod
+    def _key(order_id: int) -> str:
+        return f"order:{order_id}"
+
+    async def get_order(self, order_id: int) -> Optional[dict]:
+        """
+        Получить заказ из кэша. Промах или недоступный Redis — None.
+        """
+        try:
+            redis = await get_redis()
+            value = await redis.get(self._key(order_id))
+        except Exception as e:
+            logger.warning(f"Кэш заказов недоступен: {e}")
+            value = None
+        if value is None:
+            ORDER_CACHE_REQUESTS.labels(result="miss").inc()
+            return None
+        ORDER_CACHE_REQUESTS.labels(result="hit").inc()
+        return json.loads(value)
+
+    async def set_order(self, order_id: int, order: OrderResponse):
+        try:
+            redis = await get_redis()
+            await redis.set(
+                self._key(order_id), order.model_dump_json(), ex=self.default_ttl
+            )
+        except Exception as e:
+            logger.warning(f"Не удалось записать заказ {order_id} в кэш: {e}")
+
+    async def invalidate(self, *order_ids: int):
+        """
+        Удалить заказы из кэша (после update/delete или по событиям ORDER_UPDATED/ORDER_DELETED).
+        При включённой реплике удаление повторяется через DB_REPLICA_MAX_LAG:
+        промах кэша мог прочитать с реплики заказ до изменения и положить
+        его обратно.
+        """
+        if not order_ids:
+            return
+        await self._delete(order_ids)
+        if replica_engine is not None:
+            task = asyncio.create_task(self._delete_later(order_ids))
+            self._delayed.add(task)
+            task.add_done_callback(self._delayed.discard)
+
+    async def _delete(self, order_ids: tuple[int, ...]):
+        try:
+            redis = await get_redis()
+            await redis.delete(*(self._key(order_id) for order_id in order_ids))
+        except Exception as e:
+            logger.warning(f"Не удалось инвалидировать кэш заказов: {e}")
+
+    async def _delete_later(self, order_ids: tuple[int, ...]):
+        await asyncio.sleep(settings.DB_REPLICA_MAX_LAG)
+        await self._delete(order_ids)
+
+
+order_cache = OrderCache()
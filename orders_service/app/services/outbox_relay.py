@@ -0,0 +1,64 @@
+import asyncio
+from itertools import groupby
+
+from loguru import logger
+
+from app.config import settings
+from app.crud.outbox import OutboxService
+from app.db import async_session_maker
+from app.kafka.kafka_client import produce_kafka_batch
+from app.services.cache_service import order_cache
+
+
+# события, после которых закэшированный заказ устарел
+CACHE_EVENTS = {"ORDER_UPDATED", "ORDER_DELETED"}
+
+
+async def drain_outbox_batch(limit: int) -> int:
+    """
+    Отправляет в Kafka одну пачку событий из outbox и удаляет её.
+    Строки удаляются только после подтверждения брокера, поэтому
+    доставка — at least once. Возвращает размер отправленной пачки.
+    """
+    async with async_session_maker() as session:
+        async with session.begin():
+            events = await OutboxService.lock_batch(session, limit)
+            if not events:
+                return 0
+            for topic, group in groupby(events, key=lambda event: event.topic):
+                # ключ — order_id: события одного заказа попадают в одну
+                # партицию и читаются в порядке отправки
+                await produce_kafka_batch(
+                    [event.payload for event in group],
+                    topic=topic,
+                    key_field="order_id",
+                )
+            await OutboxService.delete_batch(session, [event.id for event in events])
+
+    # Повторная инвалидация закрывает гонку, когда читатель успел положить
+    # в кэш старую (или уже удалённую) версию заказа между коммитом
+    # и инвалидацией в роуте.
+    changed = [
+        event.payload["order_id"]
+        for event in events
+        if event.payload.get("event") in CACHE_EVENTS
+    ]
+    await order_cache.invalidate(*changed)
+    return len(events)
+
+
+async def run_outbox_relay():
+    """
+    Фоновая задача из lifespan: разгружает outbox, пока он не опустеет,
+    затем опрашивает его раз в OUTBOX_POLL_INTERVAL секунд.
+    """
+    while True:
+        try:
+            sent = await drain_outbox_batch(settings.OUTBOX_BATCH_SIZE)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Ошибка при отправке событий из outbox: {e}")
+            sent = 0
+        if sent < settings.OUTBOX_BATCH_SIZE:
+            await asyncio.sleep(settings.OUTBOX_POLL_INTERVAL)
@@ -0,0 +1,45 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Tuple
+
+from fastapi import HTTPException
+
+
+# orders.id — integer
+MIN_ORDER_ID = -(2**31)
+MAX_ORDER_ID = 2**31 - 1
+
+
+def encode_cursor(created_at: datetime, order_id: int) -> str:
+    """
+    Кодирует позицию последнего заказа страницы (created_at, id)
+    в непрозрачную строку для параметра cursor.
+    """
+    raw = json.dumps([created_at.isoformat(), order_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Обратное преобразование cursor -> (created_at, id).
+    При битом курсоре, в том числе декодируемом, но другой формы,
+    отдаёт 400, а не ошибку базы.
+    """
+    try:
+        value = json.loads(base64.urlsafe_b64decode(cursor))
+        if not isinstance(value, list) or len(value) != 2:
+            raise ValueError("cursor должен быть парой [created_at, id]")
+        created_at, order_id = value
+        # bool — подкласс int, его отсекаем явно
+        if not isinstance(order_id, int) or isinstance(order_id, bool):
+            raise TypeError("id в cursor должен быть числом")
+        if not MIN_ORDER_ID <= order_id <= MAX_ORDER_ID:
+            raise ValueError("id в cursor вне диапазона")
+        created_at = datetime.fromisoformat(created_at)
+        if created_at.tzinfo is None:
+            raise ValueError("created_at в cursor без часового пояса")
+        return created_at, order_id
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Некорректный cursor")
@@ -1,4 +1,7 @@
+import hashlib
+import time
 import uuid
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Tuple
 
@@ -8,10 +11,49 @@ from fastapi import HTTPException
 from app.jwt_config import settings_jwt
 
 
+class VerifiedTokenCache:
+    """
+    LRU уже проверенных access-токенов: sha256(токен) -> (exp, payload).
+    Запись отдаётся только до exp токена, так что просроченный токен
+    из кэша не пройдёт.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._items: OrderedDict[bytes, Tuple[float, dict]] = OrderedDict()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[dict]:
+        key = self._key(token)
+        item = self._items.get(key)
+        if item is None:
+            return None
+        exp, payload = item
+        if exp <= time.time():
+            del self._items[key]
+            return None
+        self._items.move_to_end(key)
+        return payload
+
+    def put(self, token: str, payload: dict):
+        exp = payload.get("exp")
+        if exp is None or self.max_size <= 0:
+            return
+        key = self._key(token)
+        self._items[key] = (exp, payload)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+
 class JWTService:
     def __init__(self):
         self.secret_key = settings_jwt.JWT_SECRET
         self.algorithm = settings_jwt.JWT_ALGORITHM
+        self.verified_tokens = VerifiedTokenCache(settings_jwt.ACCESS_TOKEN_CACHE_SIZE)
 
     def decode_token(self, token: str) -> dict:
         try:
@@ -26,13 +68,19 @@ class JWTService:
         - валидна ли подпись
         - не истёк ли срок
         - является ли токеном типа 'access'
-        Возвращает payload.
+        Возвращает payload. Повторная проверка того же токена до его exp
+        берётся из verified_tokens без разбора подписи.
         """
+        payload = self.verified_tokens.get(token)
+        if payload is not None:
+            return payload
+
         payload = self.decode_token(token)
 
         if payload.get("type") != "access":
             raise HTTPException(status_code=401, detail="Недопустимый тип токена")
 
+        self.verified_tokens.put(token, payload)
         return payload
 
     def get_user_id_from_token(self, token: str) -> str:
@@ -4,7 +4,14 @@
 # sys.path.insert(0, dirname(dirname(abspath(__file__))))
 
 from app.db import DATABASE_URL, Base
-from app.models.db import OrderStatuses, Orders, OrderItems
+from app.models.db import (
+    OrderStatuses,
+    Orders,
+    OrderItems,
+    OrderOutbox,
+    UserOrderStats,
+    DailyOrderStats,
+)
 
 import asyncio
 from logging.config import fileConfig
@@ -0,0 +1,153 @@
+"""partition orders by month
+
+Revision ID: 4d63a150735a
+Revises: e924ec9d99e8
+Create Date: 2026-10-18 13:05:41.218370
+
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "4d63a150735a"
+down_revision = "e924ec9d99e8"
+branch_labels = None
+depends_on = None
+
+
+# Сколько месяцев вперёд нарезать секций сразу при миграции.
+# Дальше их досоздаёт python -m scripts.partitions ensure.
+MONTHS_AHEAD = 3
+
+COLUMNS = "id, user_id, status_id, estimated_cost, total_price, created_at, updated_at"
+
+
+def upgrade() -> None:
+    # У секционированной таблицы первичный ключ обязан включать ключ
+    # секционирования, поэтому orders.id перестаёт быть уникальным сам по
+    # себе и внешний ключ order_items -> orders держать больше не на что.
+    # Позиции удаляются вместе с заказом в OrderService.delete.
+    op.execute("ALTER TABLE order_items DROP CONSTRAINT order_items_order_id_fkey")
+
+    op.execute("ALTER TABLE orders RENAME TO orders_legacy")
+    op.execute(
+        "ALTER TABLE orders_legacy RENAME CONSTRAINT orders_pkey TO orders_legacy_pkey"
+    )
+    op.execute(
+        "ALTER INDEX ix_orders_user_id_created_at_id "
+        "RENAME TO ix_orders_legacy_user_id_created_at_id"
+    )
+
+    op.execute(
+        """
+        CREATE TABLE orders (
+            id integer NOT NULL DEFAULT nextval('orders_id_seq'),
+            user_id uuid NOT NULL,
+            status_id integer REFERENCES order_statuses (id) ON DELETE SET NULL,
+            estimated_cost double precision,
+            total_price double precision NOT NULL,
+            created_at timestamp with time zone NOT NULL DEFAULT now(),
+            updated_at timestamp with time zone NOT NULL DEFAULT now(),
+            CONSTRAINT orders_pkey PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+        """
+    )
+    op.execute("ALTER SEQUENCE orders_id_seq OWNED BY orders.id")
+
+    # Месячная секция orders_YYYY_MM с границами по UTC.
+    # Функцией пользуются и миграция, и scripts/partitions.py.
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION orders_create_partition(p_month date)
+        RETURNS text
+        LANGUAGE plpgsql
+        AS $$
+        DECLARE
+            month_start date := date_trunc('month', p_month)::date;
+            part_name text := 'orders_' || to_char(month_start, 'YYYY_MM');
+        BEGIN
+            EXECUTE format(
+                'CREATE TABLE IF NOT EXISTS %I PARTITION OF orders '
+                'FOR VALUES FROM (%L) TO (%L)',
+                part_name,
+                month_start::timestamp AT TIME ZONE 'UTC',
+                (month_start + interval '1 month')::timestamp AT TIME ZONE 'UTC'
+            );
+            RETURN part_name;
+        END;
+        $$
+        """
+    )
+    op.execute(
+        f"""
+        SELECT orders_create_partition(month::date)
+        FROM generate_series(
+            date_trunc('month', coalesce(
+                (SELECT min(created_at) FROM orders_legacy), now()
+            ) AT TIME ZONE 'UTC'),
+            date_trunc('month', now() AT TIME ZONE 'UTC')
+                + interval '{MONTHS_AHEAD} months',
+            interval '1 month'
+        ) AS month
+        """
+    )
+    # страховка на случай, если секции вперёд вовремя не досоздали
+    op.execute("CREATE TABLE orders_default PARTITION OF orders DEFAULT")
+
+    op.execute(f"INSERT INTO orders ({COLUMNS}) SELECT {COLUMNS} FROM orders_legacy")
+    op.execute("DROP TABLE orders_legacy")
+
+    # индекс на секционированной таблице создаётся на каждой секции
+    op.execute(
+        "CREATE INDEX ix_orders_user_id_created_at_id "
+        "ON orders (user_id, created_at DESC, id DESC)"
+    )
+    op.execute("ANALYZE orders")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE orders RENAME TO orders_partitioned")
+    op.execute(
+        "ALTER TABLE orders_partitioned RENAME CONSTRAINT orders_pkey "
+        "TO orders_partitioned_pkey"
+    )
+    op.execute(
+        "ALTER INDEX ix_orders_user_id_created_at_id "
+        "RENAME TO ix_orders_partitioned_user_id_created_at_id"
+    )
+
+    op.execute(
+        """
+        CREATE TABLE orders (
+            id integer NOT NULL DEFAULT nextval('orders_id_seq'),
+            user_id uuid NOT NULL,
+            status_id integer REFERENCES order_statuses (id) ON DELETE SET NULL,
+            estimated_cost double precision,
+            total_price double precision NOT NULL,
+            created_at timestamp with time zone NOT NULL DEFAULT now(),
+            updated_at timestamp with time zone NOT NULL DEFAULT now(),
+            CONSTRAINT orders_pkey PRIMARY KEY (id)
+        )
+        """
+    )
+    op.execute("ALTER SEQUENCE orders_id_seq OWNED BY orders.id")
+    op.execute(
+        f"INSERT INTO orders ({COLUMNS}) SELECT {COLUMNS} FROM orders_partitioned"
+    )
+    # секции, отсоединённые в архив, остаются в схеме archive
+    op.execute("DROP TABLE orders_partitioned")
+    op.execute("DROP FUNCTION orders_create_partition(date)")
+
+    op.execute(
+        "CREATE INDEX ix_orders_user_id_created_at_id "
+        "ON orders (user_id, created_at DESC, id DESC)"
+    )
+    op.execute(
+        "DELETE FROM order_items AS i "
+        "WHERE NOT EXISTS (SELECT 1 FROM orders AS o WHERE o.id = i.order_id)"
+    )
+    op.execute(
+        "ALTER TABLE order_items ADD CONSTRAINT order_items_order_id_fkey "
+        "FOREIGN KEY (order_id) REFERENCES orders (id) ON DELETE CASCADE"
+    )
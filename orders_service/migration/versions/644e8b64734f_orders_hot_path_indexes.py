@@ -0,0 +1,51 @@
+"""orders hot path indexes
+
+Revision ID: 644e8b64734f
+Revises: 4b5267c7a258
+Create Date: 2026-10-18 11:02:17.459120
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "644e8b64734f"
+down_revision = "4b5267c7a258"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY, чтобы не блокировать запись в большие таблицы;
+    # такой индекс нельзя строить внутри транзакции миграции.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_orders_user_id_created_at_id",
+            "orders",
+            ["user_id", sa.text("created_at DESC"), sa.text("id DESC")],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            op.f("ix_order_items_order_id"),
+            "order_items",
+            ["order_id"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            op.f("ix_order_items_order_id"),
+            table_name="order_items",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_orders_user_id_created_at_id",
+            table_name="orders",
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,65 @@
+"""order locations
+
+Revision ID: 7a2c9e41b8d6
+Revises: 4d63a150735a
+Create Date: 2026-10-18 18:02:37.410925
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "7a2c9e41b8d6"
+down_revision = "4d63a150735a"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Глобального уникального индекса на orders.id у секционированной таблицы
+    # быть не может: уникальный индекс обязан включать created_at. Вместо него
+    # id -> created_at хранится в order_locations: первичный ключ снова делает
+    # id уникальным, а поиск заказа по id идёт в одну секцию, а не во все.
+    # Цена — лишняя строка и запись в индекс на каждый заказ.
+    op.create_table(
+        "order_locations",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.execute(
+        """
+        CREATE FUNCTION orders_track_location()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                DELETE FROM order_locations
+                WHERE id = OLD.id AND created_at = OLD.created_at;
+                RETURN OLD;
+            END IF;
+            INSERT INTO order_locations (id, created_at)
+            VALUES (NEW.id, NEW.created_at);
+            RETURN NEW;
+        END;
+        $$
+        """
+    )
+    # триггер на секционированной таблице клонируется на все её секции,
+    # в том числе на созданные позже
+    op.execute(
+        "CREATE TRIGGER orders_track_location AFTER INSERT OR DELETE ON orders "
+        "FOR EACH ROW EXECUTE FUNCTION orders_track_location()"
+    )
+    op.execute(
+        "INSERT INTO order_locations (id, created_at) SELECT id, created_at FROM orders"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER orders_track_location ON orders")
+    op.execute("DROP FUNCTION orders_track_location()")
+    op.drop_table("order_locations")
@@ -0,0 +1,106 @@
+"""move rows out of default partition
+
+Revision ID: b3f0d6a8c215
+Revises: 7a2c9e41b8d6
+Create Date: 2026-10-18 18:31:09.552184
+
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "b3f0d6a8c215"
+down_revision = "7a2c9e41b8d6"
+branch_labels = None
+depends_on = None
+
+
+# Если ensure пропустил запуск и заказы месяца уже легли в orders_default,
+# секцию на этот месяц не создать: Postgres откажет, пока в default есть
+# строки из её диапазона. Тогда default отсоединяется, его строки месяца
+# переносятся в новую секцию и default подключается обратно, всё в одной
+# транзакции. Записи order_locations удаляются заранее: триггер новой
+# секции вставит их снова.
+CREATE_PARTITION = """
+CREATE OR REPLACE FUNCTION orders_create_partition(p_month date)
+RETURNS text
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    month_start date := date_trunc('month', p_month)::date;
+    part_name text := 'orders_' || to_char(month_start, 'YYYY_MM');
+    range_from timestamptz := month_start::timestamp AT TIME ZONE 'UTC';
+    range_to timestamptz :=
+        (month_start + interval '1 month')::timestamp AT TIME ZONE 'UTC';
+    moved bigint;
+BEGIN
+    IF to_regclass(part_name) IS NOT NULL THEN
+        RETURN part_name;
+    END IF;
+
+    PERFORM 1 FROM orders_default
+    WHERE created_at >= range_from AND created_at < range_to
+    LIMIT 1;
+    IF NOT FOUND THEN
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF orders FOR VALUES FROM (%L) TO (%L)',
+            part_name, range_from, range_to
+        );
+        RETURN part_name;
+    END IF;
+
+    ALTER TABLE orders DETACH PARTITION orders_default;
+    EXECUTE format(
+        'CREATE TABLE %I PARTITION OF orders FOR VALUES FROM (%L) TO (%L)',
+        part_name, range_from, range_to
+    );
+    DELETE FROM order_locations AS l
+    USING orders_default AS d
+    WHERE l.id = d.id AND d.created_at >= range_from AND d.created_at < range_to;
+    EXECUTE format(
+        'WITH moved AS ('
+        '    DELETE FROM orders_default'
+        '    WHERE created_at >= $1 AND created_at < $2'
+        '    RETURNING *'
+        ') INSERT INTO %I SELECT * FROM moved',
+        part_name
+    ) USING range_from, range_to;
+    GET DIAGNOSTICS moved = ROW_COUNT;
+    ALTER TABLE orders ATTACH PARTITION orders_default DEFAULT;
+
+    RAISE WARNING 'из orders_default в % перенесено строк: %', part_name, moved;
+    RETURN part_name;
+END;
+$$
+"""
+
+# прежнее определение из 4d63a150735a
+CREATE_PARTITION_OLD = """
+CREATE OR REPLACE FUNCTION orders_create_partition(p_month date)
+RETURNS text
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    month_start date := date_trunc('month', p_month)::date;
+    part_name text := 'orders_' || to_char(month_start, 'YYYY_MM');
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF orders '
+        'FOR VALUES FROM (%L) TO (%L)',
+        part_name,
+        month_start::timestamp AT TIME ZONE 'UTC',
+        (month_start + interval '1 month')::timestamp AT TIME ZONE 'UTC'
+    );
+    RETURN part_name;
+END;
+$$
+"""
+
+
+def upgrade() -> None:
+    op.execute(CREATE_PARTITION)
+
+
+def downgrade() -> None:
+    op.execute(CREATE_PARTITION_OLD)
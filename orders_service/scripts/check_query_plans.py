@@ -0,0 +1,200 @@
+"""
+Проверка планов горячих запросов OrderService.
+
+Наливает в транзакции синтетические заказы, прогоняет EXPLAIN для запросов,
+которые строит OrderService, и падает, если хоть один из них читает
+orders/order_items (или их секции) последовательным сканом. Пустые
+секции не в счёт: их планировщик законно читает seq scan'ом. Для страницы
+по cursor ещё проверяется, что секции новее cursor'а отсечены. Транзакция
+в конце откатывается, так что базу можно использовать любую,
+вплоть до staging.
+
+Запуск из каталога orders_service:
+    python -m scripts.check_query_plans --orders 200000 --users 2000
+"""
+
+import argparse
+import asyncio
+import sys
+import json
+import re
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, text
+from sqlalchemy.dialects import postgresql
+
+from app.crud.orders import OrderService
+from app.db import engine
+from app.models.db import OrderItems, Orders
+
+
+HOT_TABLES = {"orders", "order_items", "order_locations"}
+# месячные секции orders_YYYY_MM и orders_default
+HOT_PARTITION = re.compile(r"^orders_(\d{4}_\d{2}|default)$")
+INDEX_SCANS = {"Index Scan", "Index Only Scan", "Bitmap Index Scan"}
+
+
+SEED_ORDERS = text(
+    """
+    INSERT INTO orders (user_id, status_id, total_price, created_at, updated_at)
+    SELECT md5((g % :users)::text)::uuid,
+           0,
+           100,
+           now() - make_interval(mins => g),
+           now()
+    FROM generate_series(1, :orders) AS g
+    """
+)
+
+SEED_ITEMS = text(
+    """
+    INSERT INTO order_items (order_id, product_id, quantity, price_at_moment)
+    SELECT o.id, (random() * 10000)::int, 1, 10
+    FROM orders AS o, generate_series(1, :items_per_order)
+    WHERE o.id > :max_id
+    """
+)
+
+
+def render(stmt) -> str:
+    return str(
+        stmt.compile(
+            dialect=postgresql.asyncpg.dialect(),
+            compile_kwargs={"literal_binds": True},
+        )
+    )
+
+
+def walk(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from walk(child)
+
+
+def is_hot(relation: str) -> bool:
+    return relation in HOT_TABLES or bool(HOT_PARTITION.match(relation))
+
+
+def check_pruning(name: str, plan: dict, cursor: datetime) -> bool:
+    """
+    В плане не должно быть месячных секций, которые целиком новее cursor'а.
+    """
+    cursor_month = cursor.strftime("%Y_%m")
+    newer = sorted(
+        {
+            node["Relation Name"]
+            for node in walk(plan)
+            if HOT_PARTITION.match(node.get("Relation Name", ""))
+            and node["Relation Name"] != "orders_default"
+            and node["Relation Name"][len("orders_") :] > cursor_month
+        }
+    )
+    status = "OK  " if not newer else "FAIL"
+    print(f"[{status}] {name}: секции новее cursor'а: {newer or '-'}")
+    return not newer
+
+
+def check_plan(name: str, plan: dict, empty: set) -> bool:
+    nodes = list(walk(plan))
+    seq_scans = [
+        node["Relation Name"]
+        for node in nodes
+        if node["Node Type"] == "Seq Scan"
+        and is_hot(node.get("Relation Name", ""))
+        and node["Relation Name"] not in empty
+    ]
+    index_scans = [node for node in nodes if node["Node Type"] in INDEX_SCANS]
+    ok = not seq_scans and bool(index_scans)
+    status = "OK  " if ok else "FAIL"
+    used = ", ".join(sorted({n.get("Index Name", "?") for n in index_scans})) or "-"
+    print(f"[{status}] {name}: индексы: {used}; seq scan: {seq_scans or '-'}")
+    return ok
+
+
+async def main(args) -> int:
+    async with engine.connect() as conn:
+        trans = await conn.begin()
+        try:
+            max_id = (
+                await conn.execute(text("SELECT coalesce(max(id), 0) FROM orders"))
+            ).scalar_one()
+            started = time.monotonic()
+            await conn.execute(
+                SEED_ORDERS, {"users": args.users, "orders": args.orders}
+            )
+            await conn.execute(
+                SEED_ITEMS,
+                {"items_per_order": args.items_per_order, "max_id": max_id},
+            )
+            await conn.execute(text("ANALYZE orders"))
+            await conn.execute(text("ANALYZE order_items"))
+            empty = set(
+                (
+                    await conn.execute(
+                        text(
+                            "SELECT relname FROM pg_class "
+                            "WHERE relkind = 'r' AND relpages = 0"
+                        )
+                    )
+                ).scalars()
+            )
+            print(f"Данные налиты за {time.monotonic() - started:.1f} с")
+
+            user_id = (
+                await conn.execute(
+                    text("SELECT user_id FROM orders WHERE id > :max_id LIMIT 1"),
+                    {"max_id": max_id},
+                )
+            ).scalar_one()
+            order_ids = (
+                (
+                    await conn.execute(
+                        select(Orders.id)
+                        .where(Orders.user_id == user_id)
+                        .limit(args.page_size)
+                    )
+                )
+                .scalars()
+                .all()
+            )
+            # cursor в прошлом месяце: текущая секция должна отсечься
+            cursor = (datetime.now(timezone.utc) - timedelta(days=35), 2**31 - 1)
+
+            cursor_query = OrderService._user_orders_query(user_id, cursor).limit(
+                args.page_size + 1
+            )
+            queries = {
+                "get_user_orders (первая страница)": OrderService._user_orders_query(
+                    user_id
+                ).limit(args.page_size + 1),
+                "get_user_orders (по cursor)": cursor_query,
+                "selectinload(Orders.items)": select(OrderItems).where(
+                    OrderItems.order_id.in_(order_ids)
+                ),
+                "get_order": select(Orders).where(OrderService._by_id(order_ids[0])),
+            }
+
+            ok = True
+            for name, stmt in queries.items():
+                result = await conn.execute(
+                    text(f"EXPLAIN (FORMAT JSON) {render(stmt)}")
+                )
+                # asyncpg отдаёт json-колонку строкой
+                plan = json.loads(result.scalar_one())[0]["Plan"]
+                ok = check_plan(name, plan, empty) and ok
+                if stmt is cursor_query:
+                    ok = check_pruning(name, plan, cursor[0]) and ok
+        finally:
+            await trans.rollback()
+    await engine.dispose()
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--orders", type=int, default=200_000)
+    parser.add_argument("--users", type=int, default=2_000)
+    parser.add_argument("--items-per-order", type=int, default=3)
+    parser.add_argument("--page-size", type=int, default=50)
+    sys.exit(asyncio.run(main(parser.parse_args())))
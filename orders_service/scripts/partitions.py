@@ -0,0 +1,168 @@
+"""
+Обслуживание месячных секций таблицы orders.
+
+ensure  — создаёт секции на текущий и несколько следующих месяцев,
+          перенося в них заказы, уже попавшие в orders_default;
+archive — отсоединяет секции старше заданного возраста и переносит их
+          в схему archive вместе с позициями этих заказов из order_items;
+list    — печатает секции и число строк в них (по статистике).
+
+Сводки user_order_stats / daily_order_stats при архивации не меняются:
+заказы уходят из горячих таблиц, но остаются в истории покупок.
+
+Запуск из каталога orders_service (например, раз в сутки по cron):
+    python -m scripts.partitions ensure --ahead 3
+    python -m scripts.partitions archive --keep-months 12
+"""
+
+import argparse
+import asyncio
+import re
+import sys
+from datetime import date, datetime, timezone
+
+from sqlalchemy import text
+
+from app.db import engine
+
+
+ARCHIVE_SCHEMA = "archive"
+PARTITION_NAME = re.compile(r"^orders_(\d{4})_(\d{2})$")
+
+
+LIST_PARTITIONS = text(
+    """
+    SELECT child.relname AS name,
+           pg_get_expr(child.relpartbound, child.oid) AS bounds,
+           child.reltuples::bigint AS rows
+    FROM pg_inherits AS i
+    JOIN pg_class AS parent ON parent.oid = i.inhparent
+    JOIN pg_class AS child ON child.oid = i.inhrelid
+    JOIN pg_namespace AS ns ON ns.oid = parent.relnamespace
+    WHERE parent.relname = 'orders' AND ns.nspname = current_schema()
+    ORDER BY child.relname
+    """
+)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def current_month() -> date:
+    return datetime.now(timezone.utc).date().replace(day=1)
+
+
+async def ensure(args) -> int:
+    start = current_month()
+    async with engine.begin() as conn:
+        for offset in range(args.ahead + 1):
+            name = (
+                await conn.execute(
+                    text("SELECT orders_create_partition(:month)"),
+                    {"month": add_months(start, offset)},
+                )
+            ).scalar_one()
+            print(f"секция {name} на месте")
+        # сюда попадают только заказы вне всех секций; заказы месяцев,
+        # на которые секции уже есть, orders_create_partition переносит
+        stray = (
+            await conn.execute(text("SELECT count(*) FROM orders_default"))
+        ).scalar_one()
+    if stray:
+        print(f"ВНИМАНИЕ: в orders_default {stray} строк вне месячных секций")
+        return 1
+    return 0
+
+
+async def archive_partition(conn, name: str):
+    """
+    Отсоединяет секцию и переносит её в схему archive.
+    Позиции архивируемых заказов копируются в archive.order_items_YYYY_MM
+    и вместе с записями order_locations удаляются в той же транзакции.
+    """
+    items_name = name.replace("orders_", "order_items_", 1)
+    await conn.execute(text(f'ALTER TABLE orders DETACH PARTITION "{name}"'))
+    await conn.execute(text(f'ALTER TABLE "{name}" SET SCHEMA {ARCHIVE_SCHEMA}'))
+    await conn.execute(
+        text(
+            f'CREATE TABLE {ARCHIVE_SCHEMA}."{items_name}" AS '
+            f"SELECT i.* FROM order_items AS i "
+            f'JOIN {ARCHIVE_SCHEMA}."{name}" AS o ON o.id = i.order_id'
+        )
+    )
+    await conn.execute(
+        text(
+            f"DELETE FROM order_items AS i "
+            f'USING {ARCHIVE_SCHEMA}."{name}" AS o WHERE o.id = i.order_id'
+        )
+    )
+    # DETACH триггеров не вызывает, записи order_locations чистим сами
+    await conn.execute(
+        text(
+            f"DELETE FROM order_locations AS l "
+            f'USING {ARCHIVE_SCHEMA}."{name}" AS o WHERE o.id = l.id'
+        )
+    )
+
+
+async def archive(args) -> int:
+    cutoff = add_months(current_month(), -args.keep_months)
+    async with engine.connect() as conn:
+        partitions = (await conn.execute(LIST_PARTITIONS)).all()
+    old = []
+    for partition in partitions:
+        match = PARTITION_NAME.match(partition.name)
+        if match and date(int(match[1]), int(match[2]), 1) < cutoff:
+            old.append(partition.name)
+
+    if not old:
+        print(f"секций старше {cutoff:%Y-%m} нет")
+        return 0
+
+    async with engine.begin() as conn:
+        await conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}"))
+    # по секции за транзакцию: DETACH берёт эксклюзивную блокировку orders,
+    # держать её дольше одного переноса незачем
+    for name in old:
+        if args.dry_run:
+            print(f"[dry-run] в архив ушла бы {name}")
+            continue
+        async with engine.begin() as conn:
+            await archive_partition(conn, name)
+        print(f"{name} -> {ARCHIVE_SCHEMA}.{name}")
+    return 0
+
+
+async def list_partitions(args) -> int:
+    async with engine.connect() as conn:
+        for partition in (await conn.execute(LIST_PARTITIONS)).all():
+            print(f"{partition.name:<20} {partition.rows:>12}  {partition.bounds}")
+    return 0
+
+
+async def main(args) -> int:
+    try:
+        return await args.handler(args)
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ensure_parser = commands.add_parser("ensure", help="создать будущие секции")
+    ensure_parser.add_argument("--ahead", type=int, default=3)
+    ensure_parser.set_defaults(handler=ensure)
+
+    archive_parser = commands.add_parser("archive", help="архивировать старые секции")
+    archive_parser.add_argument("--keep-months", type=int, default=12)
+    archive_parser.add_argument("--dry-run", action="store_true")
+    archive_parser.set_defaults(handler=archive)
+
+    list_parser = commands.add_parser("list", help="показать секции")
+    list_parser.set_defaults(handler=list_partitions)
+
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -1,4 +1,5 @@
 import time
+import asyncio
 from pathlib import Path
 from contextlib import asynccontextmanager
 
@@ -10,6 +11,7 @@ from starlette.responses import Response
 from app.routes.reviews import reviews
 from app.mongo.mongo_init import init_mongo_collections
 from app.kafka.kafka_client import init_kafka_producer, stop_kafka_producer
+from app.redis.redis_client import close_redis, run_redis_health_check
 from app.logger import setup_logger
 
 setup_logger()
@@ -23,9 +25,16 @@ async def lifespan(app: FastAPI):
     await init_mongo_collections()
     logger.info("инициализация кафки")
     await init_kafka_producer()
+    redis_health = asyncio.create_task(run_redis_health_check())
     yield
     logger.info("Останока сервера")
+    redis_health.cancel()
+    try:
+        await redis_health
+    except asyncio.CancelledError:
+        pass
     await stop_kafka_producer()
+    await close_redis()
 
 
 app = FastAPI(
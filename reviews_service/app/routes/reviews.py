@@ -9,7 +9,7 @@ from app.schemas.reviews import (
     ReviewListResponse,
 )
 from app.services.img_review import save_uploaded_file, get_file
-from app.kafka.kafka_client import produce_kafka_message
+from app.kafka.kafka_client import send_kafka_message
 from app.services.check_token_service import require_access_token, require_permission
 
 
@@ -51,7 +51,15 @@ async def create_review(request: Request, form: ReviewForm = Depends()) -> dict:
     async with Mongo() as db:
         result = await db["reviews"].insert_one(review_data)
         review_data["_id"] = str(result.inserted_id)
-    await produce_kafka_message(value={"event": "REVIEW_CREATED", "data": review_data})
+    await send_kafka_message(
+        value={
+            "event": "REVIEW_CREATED",
+            "data": {
+                **review_data,
+                "created_at": review_data["created_at"].isoformat(),
+            },
+        }
+    )
     return {"message": "Review created", "data": review_data}
 
 
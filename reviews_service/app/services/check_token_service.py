@@ -1,20 +1,56 @@
 from functools import wraps
+from typing import FrozenSet
 from fastapi import Request, Response, HTTPException
 from app.services.token_service import jwt_service
+from app.services.permission_table import permission_table
+
+
+def get_token_payload(request: Request) -> dict:
+    """
+    Claims access-токена текущего запроса. Токен проверяется один раз
+    за запрос, результат лежит в request.state.token_payload и общий
+    для всех guard'ов. Можно использовать и как зависимость FastAPI.
+    """
+    payload = getattr(request.state, "token_payload", None)
+    if payload is not None:
+        return payload
+
+    token = request.cookies.get("access_token")
+    if not token:
+        raise HTTPException(status_code=401, detail="Access token отсутствует")
+    try:
+        payload = jwt_service.verify_access_token(token)
+    except Exception:
+        raise HTTPException(
+            status_code=401, detail="Неверный или просроченный access token"
+        )
+    request.state.token_payload = payload
+    return payload
+
+
+async def get_permissions(request: Request) -> FrozenSet[str]:
+    """
+    Множество кодов разрешений текущего запроса. Компактный токен
+    (role_id + perm_v) разрешается по закэшированной таблице ролей,
+    обычный — по списку permissions из токена.
+    """
+    permissions = getattr(request.state, "permissions", None)
+    if permissions is not None:
+        return permissions
+
+    payload = get_token_payload(request)
+    if "perm_v" in payload:
+        permissions = await permission_table.get(payload["role_id"], payload["perm_v"])
+    else:
+        permissions = frozenset(payload.get("permissions", []))
+    request.state.permissions = permissions
+    return permissions
 
 
 def require_access_token(handler):
     @wraps(handler)
     async def wrapper(request: Request, *args, **kwargs):
-        token = request.cookies.get("access_token")
-        if not token:
-            raise HTTPException(status_code=401, detail="Access token отсутствует")
-        try:
-            jwt_service.verify_access_token(token)
-        except Exception:
-            raise HTTPException(
-                status_code=401, detail="Неверный или просроченный access token"
-            )
+        get_token_payload(request)
         return await handler(request, *args, **kwargs)
 
     return wrapper
@@ -24,19 +60,7 @@ def require_permission(required_permission: str):
     def decorator(handler):
         @wraps(handler)
         async def wrapper(request: Request, *args, **kwargs):
-            token = request.cookies.get("access_token")
-            if not token:
-                raise HTTPException(status_code=401, detail="Access token отсутствует")
-
-            try:
-                payload = jwt_service.verify_access_token(token)
-                permissions = payload.get("permissions", [])
-            except Exception:
-                raise HTTPException(
-                    status_code=401, detail="Неверный или просроченный access token"
-                )
-
-            if required_permission not in permissions:
+            if required_permission not in await get_permissions(request):
                 raise HTTPException(status_code=403, detail="Недостаточно прав")
 
             return await handler(request, *args, **kwargs)
@@ -0,0 +1,73 @@
+from typing import Dict, FrozenSet, Optional
+import asyncio
+import json
+import time
+
+from loguru import logger
+
+from app.jwt_config import settings_jwt
+from app.redis.redis_client import get_redis
+
+
+# Таблица role_id -> JSON-список кодов разрешений, которую публикует
+# auth_service; в поле _version — её версия (см. perm_v в токене).
+TABLE_KEY = "role_permissions"
+VERSION_FIELD = "_version"
+
+
+class PermissionTable:
+    """
+    Копия таблицы ролей в памяти процесса для компактных токенов.
+    Перечитывается из Redis не чаще раза в ttl секунд; токен с версией
+    новее загруженной вызывает одно внеочередное чтение на версию.
+    Если таблицы в Redis нет или Redis недоступен, остаётся последняя
+    загруженная копия.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.version = 0
+        self._roles: Dict[int, FrozenSet[str]] = {}
+        # время и версия токена последней попытки чтения, удачной или нет
+        self._checked_at: Optional[float] = None
+        self._requested_version = 0
+        self._lock = asyncio.Lock()
+
+    def _is_stale(self, version: int) -> bool:
+        if self._checked_at is None:
+            return True
+        if time.monotonic() - self._checked_at > self.ttl:
+            return True
+        # без этой проверки токен с версией, которой нет в Redis
+        # (таблицу потеряли), перечитывал бы таблицу на каждом запросе
+        return version > self.version and version > self._requested_version
+
+    async def _load(self, version: int):
+        self._checked_at = time.monotonic()
+        self._requested_version = max(self._requested_version, version)
+        try:
+            redis = await get_redis()
+            raw = await redis.hgetall(TABLE_KEY)
+        except Exception as e:
+            logger.error(f"Не удалось прочитать таблицу разрешений: {e}")
+            return
+        if VERSION_FIELD not in raw:
+            logger.error(
+                f"Таблицы разрешений {TABLE_KEY} нет в Redis, "
+                f"используется загруженная версия {self.version}"
+            )
+            return
+        self.version = int(raw.pop(VERSION_FIELD))
+        self._roles = {
+            int(role_id): frozenset(json.loads(codes)) for role_id, codes in raw.items()
+        }
+
+    async def get(self, role_id: Optional[int], version: int = 0) -> FrozenSet[str]:
+        if self._is_stale(version):
+            async with self._lock:
+                if self._is_stale(version):
+                    await self._load(version)
+        return self._roles.get(role_id, frozenset())
+
+
+permission_table = PermissionTable(settings_jwt.PERMISSION_TABLE_TTL)